@@ -9,6 +9,9 @@ Endpoint used:
 
 Sampling: 1 day per week (every 7 days)
 Timeframe: 6 months
+Requests: sampled days are coalesced into a few long start/end ranges per
+          point (see aqi_hourly.plan_range_requests) and sliced back into
+          per-day records locally
 Parameters collected:
     - AQI (Air Quality Index)
     - CO (carbon monoxide)
@@ -22,22 +25,29 @@ Parameters collected:
 
 Output:
     A CSV file containing 24 samples per coordinate (≈720 total records)
+    with daily mean, max and p95 per parameter, plus a compressed `.npz`
+    holding the full hourly series (see aqi_hourly.py)
 """
 
 import os
 import pandas as pd
 import requests
-import time
 from datetime import datetime, timedelta
+from owm_quota import PRIORITY_BACKFILL, QuotaBroker, QuotaExhausted
+from aqi_hourly import (
+    MAX_RANGE_SECONDS, aggregate_windows, decode_json, parse_aqi_response,
+    plan_range_requests, save_hourly, window_records,
+)
 
 # === CONFIGURATION ===
 API_KEY = os.getenv("OWM_API_KEY")
 INPUT_CSV = "ncr_sample_points.csv"
 OUTPUT_CSV = "ncr_1to6_25_B.csv"
+HOURLY_NPZ = "ncr_1to6_25_B_hourly.npz"
 
 # 6-month range (same as your climate data)
 START_DATE = datetime(2025, 1, 1)
-END_DATE = datetime(2025, 6, 31)
+END_DATE = datetime(2025, 6, 30)
 STEP = timedelta(days=7)  # 1 sample per week
 
 # === LOAD POINTS ===
@@ -45,75 +55,90 @@ points = pd.read_csv(INPUT_CSV)
 print(f"Loaded {len(points)} coordinates from {INPUT_CSV}")
 
 # === STORAGE ===
+broker = QuotaBroker()
 records = []
+hourly_ids, hourly_dt, hourly_values = [], [], []
 
 # === MAIN LOOP ===
-for _, row in points.iterrows():
-    lat = row["Latitude"]
-    lon = row["Longitude"]
-    point_id = row["Point_ID"]
-
-    date = START_DATE
-    while date <= END_DATE:
-        start_unix = int(date.timestamp())
-        end_unix = int((date + timedelta(days=1)).timestamp())  # 24-hour window
-
-        url = (
-            f"http://api.openweathermap.org/data/2.5/air_pollution/history?"
-            f"lat={lat}&lon={lon}&start={start_unix}&end={end_unix}&appid={API_KEY}"
-        )
-
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-
-            if "list" not in data or not data["list"]:
-                print(f"⚠️ No AQI data for {point_id} on {date.strftime('%Y-%m-%d')}")
-                date += STEP
-                continue
-
-            # Compute average of hourly values
-            aqi_vals, co_vals, no_vals, no2_vals, o3_vals, so2_vals, pm25_vals, pm10_vals, nh3_vals = ([] for _ in range(9))
-
-            for entry in data["list"]:
-                comp = entry["components"]
-                aqi_vals.append(entry["main"]["aqi"])
-                co_vals.append(comp.get("co"))
-                no_vals.append(comp.get("no"))
-                no2_vals.append(comp.get("no2"))
-                o3_vals.append(comp.get("o3"))
-                so2_vals.append(comp.get("so2"))
-                pm25_vals.append(comp.get("pm2_5"))
-                pm10_vals.append(comp.get("pm10"))
-                nh3_vals.append(comp.get("nh3"))
-
-            record = {
-                "point_id": point_id,
-                "latitude": lat,
-                "longitude": lon,
-                "date": date.strftime("%Y-%m-%d"),
-                "aqi_mean": sum(aqi_vals) / len(aqi_vals),
-                "co_mean": sum(co_vals) / len(co_vals),
-                "no_mean": sum(no_vals) / len(no_vals),
-                "no2_mean": sum(no2_vals) / len(no2_vals),
-                "o3_mean": sum(o3_vals) / len(o3_vals),
-                "so2_mean": sum(so2_vals) / len(so2_vals),
-                "pm2_5_mean": sum(pm25_vals) / len(pm25_vals),
-                "pm10_mean": sum(pm10_vals) / len(pm10_vals),
-                "nh3_mean": sum(nh3_vals) / len(nh3_vals),
-            }
-
-            records.append(record)
-            print(f"✅ {point_id} {date.strftime('%Y-%m-%d')} AQI data fetched successfully.")
-
-        except requests.exceptions.RequestException as e:
-            print(f"⚠️ Error fetching {point_id} {date.strftime('%Y-%m-%d')}: {e}")
-
-        time.sleep(1)
-        date += STEP
+# Sampled 24-hour windows, shared by every point
+sample_dates = []
+date = START_DATE
+while date <= END_DATE:
+    sample_dates.append(date)
+    date += STEP
+window_starts = [int(d.timestamp()) for d in sample_dates]
+window_ends = [int((d + timedelta(days=1)).timestamp()) for d in sample_dates]
+
+# Coalesce the sampled days into long-range requests
+request_plan = plan_range_requests(window_starts, window_ends, MAX_RANGE_SECONDS)
+print(f"Planned {len(request_plan)} requests per point for {len(sample_dates)} sampled days")
+
+complete = True
+try:
+    for _, row in points.iterrows():
+        lat = row["Latitude"]
+        lon = row["Longitude"]
+        point_id = row["Point_ID"]
+
+        for range_start, range_end, window_idx in request_plan:
+            range_label = (
+                f"{datetime.fromtimestamp(range_start).strftime('%Y-%m-%d')}"
+                f"..{datetime.fromtimestamp(range_end).strftime('%Y-%m-%d')}"
+            )
+
+            url = (
+                f"http://api.openweathermap.org/data/2.5/air_pollution/history?"
+                f"lat={lat}&lon={lon}&start={range_start}&end={range_end}&appid={API_KEY}"
+            )
+
+            try:
+                broker.acquire(PRIORITY_BACKFILL)
+                response = requests.get(url)
+                response.raise_for_status()
+                data = decode_json(response.content)
+
+                if "list" not in data or not data["list"]:
+                    print(f"⚠️ No AQI data for {point_id} in {range_label}")
+                    continue
+
+                # Parse the hourly series once, then slice it back into sampled days
+                dt, values = parse_aqi_response(data)
+                hourly_ids.append(point_id)
+                hourly_dt.append(dt)
+                hourly_values.append(values)
+
+                aggregates = aggregate_windows(
+                    dt, values,
+                    [window_starts[i] for i in window_idx],
+                    [window_ends[i] for i in window_idx],
+                )
+                for k, (i, daily) in enumerate(zip(window_idx, window_records(aggregates))):
+                    if aggregates["count"][k] == 0:
+                        print(f"⚠️ No AQI data for {point_id} on {sample_dates[i].strftime('%Y-%m-%d')}")
+                        continue
+                    records.append({
+                        "point_id": point_id,
+                        "latitude": lat,
+                        "longitude": lon,
+                        "date": sample_dates[i].strftime("%Y-%m-%d"),
+                        **daily,
+                    })
+
+                print(f"✅ {point_id} {range_label} AQI data fetched successfully ({len(window_idx)} days).")
+
+            except requests.exceptions.RequestException as e:
+                print(f"⚠️ Error fetching {point_id} {range_label}: {e}")
+except (QuotaExhausted, TimeoutError) as e:
+    complete = False
+    print(f"⚠️ OWM quota: {e}. Saving partial results.")
 
 # === SAVE RESULTS ===
 df = pd.DataFrame(records)
 df.to_csv(OUTPUT_CSV, index=False)
-print(f"\n✅ AQI data collection complete! Saved to {OUTPUT_CSV}")
\ No newline at end of file
+if complete:
+    print(f"\n✅ AQI data collection complete! Saved to {OUTPUT_CSV}")
+else:
+    print(f"\n⚠️ Saved {len(df)} rows so far to {OUTPUT_CSV}")
+
+save_hourly(HOURLY_NPZ, hourly_ids, hourly_dt, hourly_values)
+print(f"✅ Hourly AQI series saved to {HOURLY_NPZ}")
\ No newline at end of file
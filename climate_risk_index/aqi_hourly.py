@@ -0,0 +1,169 @@
+"""
+Columnar AQI Parsing and Hourly Store
+-------------------------------------
+Helpers for `aqi_API_call.py`.
+
+- parse_aqi_response : turns the `list` payload of an Air Pollution History
+                       response straight into NumPy columns
+- aggregate_windows  : vectorized daily mean / max / percentile aggregates
+                       over [start, end) time windows
+- save_hourly / load_hourly : compact float32 hourly series in a `.npz`
+- plan_range_requests : coalesces sampled day windows into long-range
+                        history requests
+
+orjson is used for decoding when installed, with the standard library
+`json` module as a fallback.
+"""
+
+import warnings
+import numpy as np
+
+try:
+    import orjson as _json_impl
+except ImportError:  # pragma: no cover - optional speedup
+    import json as _json_impl
+
+# === CONFIGURATION ===
+COMPONENTS = ["co", "no", "no2", "o3", "so2", "pm2_5", "pm10", "nh3"]
+COLUMNS = ["aqi"] + COMPONENTS
+PERCENTILES = [95]
+MAX_RANGE_SECONDS = 60 * 86400  # longest start/end span per history request
+
+
+# === REQUEST PLANNING ===
+def plan_range_requests(starts, ends, max_range=MAX_RANGE_SECONDS):
+    """
+    Merge [start, end) windows into as few long-range requests as allowed.
+
+    Windows are grouped greedily in time order; a group is closed when
+    adding the next window would make its span exceed `max_range`.
+    Returns a list of (range_start, range_end, window_indices).
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    order = np.argsort(starts, kind="stable")
+    plan = []
+    group = []
+    group_start = group_end = None
+    for i in order:
+        if group and ends[i] - group_start > max_range:
+            plan.append((int(group_start), int(group_end), group))
+            group = []
+        if not group:
+            group_start, group_end = starts[i], ends[i]
+        group.append(int(i))
+        group_end = max(group_end, ends[i])
+    if group:
+        plan.append((int(group_start), int(group_end), group))
+    return plan
+
+
+# === PARSING ===
+def decode_json(raw):
+    """Decode a raw response body (bytes or str)."""
+    return _json_impl.loads(raw)
+
+
+def parse_aqi_response(data):
+    """
+    Convert an air_pollution/history payload to columns.
+
+    Returns (dt, values) where dt is int64 unix seconds (n_hours,) and
+    values is float64 (n_hours, len(COLUMNS)) in COLUMNS order.
+    Missing components are NaN.
+    """
+    entries = data.get("list") or []
+    n = len(entries)
+    dt = np.fromiter((e["dt"] for e in entries), dtype=np.int64, count=n)
+    values = np.empty((n, len(COLUMNS)), dtype=np.float64)
+    values[:, 0] = np.fromiter((e["main"]["aqi"] for e in entries), dtype=np.float64, count=n)
+    comps = [e["components"] for e in entries]
+    nan = float("nan")
+    for j, key in enumerate(COMPONENTS, start=1):
+        values[:, j] = np.fromiter(
+            (nan if c.get(key) is None else c[key] for c in comps), dtype=np.float64, count=n
+        )
+    order = np.argsort(dt, kind="stable")
+    return dt[order], values[order]
+
+
+# === AGGREGATION ===
+def aggregate_windows(dt, values, starts, ends, percentiles=PERCENTILES):
+    """
+    Aggregate sorted hourly rows into [start, end) windows.
+
+    Returns a dict of (n_windows, n_cols) arrays: "count", "mean", "max"
+    and one "p<q>" entry per percentile. Empty windows are NaN.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    lo = np.searchsorted(dt, starts, side="left")
+    hi = np.searchsorted(dt, ends, side="left")
+    counts = hi - lo
+    n_win, n_cols = len(starts), values.shape[1]
+
+    # Pad every window into one (windows x max_hours x cols) block
+    width = int(counts.max()) if n_win and counts.max() > 0 else 1
+    offsets = np.arange(width)
+    take = lo[:, None] + offsets[None, :]
+    mask = offsets[None, :] < counts[:, None]
+    block = np.full((n_win, width, n_cols), np.nan, dtype=np.float64)
+    if len(dt):
+        block[mask] = values[np.minimum(take, len(dt) - 1)][mask]
+
+    # All-NaN (empty) windows are expected; silence their RuntimeWarnings
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        out = {
+            "count": counts,
+            "mean": np.nanmean(block, axis=1),
+            "max": np.nanmax(block, axis=1),
+        }
+        for q in percentiles:
+            out[f"p{q}"] = np.nanpercentile(block, q, axis=1)
+    return out
+
+
+def window_records(aggregates, suffixes=("mean", "max") + tuple(f"p{q}" for q in PERCENTILES)):
+    """Flatten aggregates into per-window dicts: {"aqi_mean": ..., "co_max": ...}."""
+    records = []
+    for i in range(len(aggregates["count"])):
+        rec = {}
+        for suffix in suffixes:
+            for j, col in enumerate(COLUMNS):
+                rec[f"{col}_{suffix}"] = float(aggregates[suffix][i, j])
+        records.append(rec)
+    return records
+
+
+# === STORAGE ===
+def save_hourly(path, point_ids, dts, values):
+    """
+    Save hourly series as a compressed `.npz`.
+
+    point_ids/dts/values are lists of per-response chunks. Point IDs are
+    dictionary-encoded to small integer codes.
+    """
+    if dts:
+        dt = np.concatenate(dts)
+        vals = np.concatenate(values).astype(np.float32)
+        pid = np.concatenate([np.full(len(d), p, dtype=object) for p, d in zip(point_ids, dts)])
+    else:
+        dt = np.empty(0, dtype=np.int64)
+        vals = np.empty((0, len(COLUMNS)), dtype=np.float32)
+        pid = np.empty(0, dtype=object)
+    names, codes = np.unique(pid.astype(str), return_inverse=True)
+    np.savez_compressed(
+        path,
+        point_names=names,
+        point_code=codes.astype(np.int16),
+        dt=dt,
+        values=vals,
+        columns=np.array(COLUMNS),
+    )
+
+
+def load_hourly(path):
+    """Load an hourly `.npz` saved by `save_hourly`."""
+    with np.load(path) as z:
+        return {k: z[k] for k in z.files}
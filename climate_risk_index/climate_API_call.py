@@ -19,14 +19,19 @@ Parameters collected:
 
 Output:
     A CSV file containing 24 samples per coordinate (≈720 total records)
+
+Quota:
+    When the shared daily OWM budget runs out (owm_quota.py), the rows
+    fetched so far are saved. Re-running resumes: (point_id, date) pairs
+    already in the output CSV are skipped.
 """
 
 import os
 import pandas as pd
 import requests
-import time
 from datetime import datetime, timedelta
 import json
+from owm_quota import PRIORITY_BACKFILL, QuotaBroker, QuotaExhausted
 
 # === CONFIGURATION ===
 API_KEY = os.getenv("OWM_API_KEY")
@@ -44,8 +49,12 @@ STEP = timedelta(days=7)
 points = pd.read_csv(INPUT_CSV)
 print(f"Loaded {len(points)} coordinates from {INPUT_CSV}")
 
-# === STORAGE ===
-records = []
+# === STORAGE (resume from a previous partial run) ===
+broker = QuotaBroker()
+records = pd.read_csv(OUTPUT_CSV).to_dict("records") if os.path.exists(OUTPUT_CSV) else []
+done = {(r["point_id"], r["date"]) for r in records}
+if done:
+    print(f"Resuming: {len(done)} point-days already in {OUTPUT_CSV}")
 
 # === HELPER FUNCTION ===
 def mean_from_fields(d):
@@ -57,60 +66,70 @@ def mean_from_fields(d):
 
 
 # === MAIN LOOP ===
-for _, row in points.iterrows():
-    lat = row["Latitude"]
-    lon = row["Longitude"]
-    point_id = row["Point_ID"]
-
-    date = start_date
-    while date <= end_date:
-        date_str = date.strftime("%Y-%m-%d")
-
-        url = (
-            f"https://api.openweathermap.org/data/3.0/onecall/day_summary?"
-            f"lat={lat}&lon={lon}&date={date_str}&appid={API_KEY}&units=metric"
-        )
-
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-
-            # Extract and compute values safely
-            temp_data = data.get("temperature", {})
-            humidity_data = data.get("humidity", {})
-            pressure_data = data.get("pressure", {})
-            wind_data = data.get("wind", {}).get("max", {})
-            cloud_data = data.get("cloud_cover", {})
-            precip_data = data.get("precipitation", {})
-
-            record = {
-                "point_id": point_id,
-                "latitude": data.get("lat"),
-                "longitude": data.get("lon"),
-                "date": data.get("date"),
-                "temp_min": temp_data.get("min"),
-                "temp_max": temp_data.get("max"),
-                "temp_mean": mean_from_fields(temp_data),
-                "humidity_mean": mean_from_fields(humidity_data),
-                "pressure_mean": mean_from_fields(pressure_data),
-                "wind_speed_max": wind_data.get("speed"),
-                "wind_direction": wind_data.get("direction"),
-                "precipitation_total": precip_data.get("total"),
-                "cloud_cover_mean": mean_from_fields(cloud_data),
-            }
-
-            records.append(record)
-            print(f"✅ {point_id} {date_str} fetched successfully.")
-
-        except requests.exceptions.RequestException as e:
-            print(f"⚠️ Error fetching {point_id} {date_str}: {e}")
-
-        # Respect rate limit (60 requests/min)
-        time.sleep(1)
-        date += STEP
+complete = True
+try:
+    for _, row in points.iterrows():
+        lat = row["Latitude"]
+        lon = row["Longitude"]
+        point_id = row["Point_ID"]
+
+        date = start_date
+        while date <= end_date:
+            date_str = date.strftime("%Y-%m-%d")
+            if (point_id, date_str) in done:
+                date += STEP
+                continue
+
+            url = (
+                f"https://api.openweathermap.org/data/3.0/onecall/day_summary?"
+                f"lat={lat}&lon={lon}&date={date_str}&appid={API_KEY}&units=metric"
+            )
+
+            try:
+                broker.acquire(PRIORITY_BACKFILL)
+                response = requests.get(url)
+                response.raise_for_status()
+                data = response.json()
+
+                # Extract and compute values safely
+                temp_data = data.get("temperature", {})
+                humidity_data = data.get("humidity", {})
+                pressure_data = data.get("pressure", {})
+                wind_data = data.get("wind", {}).get("max", {})
+                cloud_data = data.get("cloud_cover", {})
+                precip_data = data.get("precipitation", {})
+
+                record = {
+                    "point_id": point_id,
+                    "latitude": data.get("lat"),
+                    "longitude": data.get("lon"),
+                    "date": data.get("date"),
+                    "temp_min": temp_data.get("min"),
+                    "temp_max": temp_data.get("max"),
+                    "temp_mean": mean_from_fields(temp_data),
+                    "humidity_mean": mean_from_fields(humidity_data),
+                    "pressure_mean": mean_from_fields(pressure_data),
+                    "wind_speed_max": wind_data.get("speed"),
+                    "wind_direction": wind_data.get("direction"),
+                    "precipitation_total": precip_data.get("total"),
+                    "cloud_cover_mean": mean_from_fields(cloud_data),
+                }
+
+                records.append(record)
+                print(f"✅ {point_id} {date_str} fetched successfully.")
+
+            except requests.exceptions.RequestException as e:
+                print(f"⚠️ Error fetching {point_id} {date_str}: {e}")
+
+            date += STEP
+except (QuotaExhausted, TimeoutError) as e:
+    complete = False
+    print(f"⚠️ OWM quota: {e}. Saving partial results; re-run to resume.")
 
 # === SAVE RESULTS ===
 df = pd.DataFrame(records)
 df.to_csv(OUTPUT_CSV, index=False)
-print(f"\n✅ Data collection complete! Saved to {OUTPUT_CSV}")
\ No newline at end of file
+if complete:
+    print(f"\n✅ Data collection complete! Saved to {OUTPUT_CSV}")
+else:
+    print(f"\n⚠️ Saved {len(df)} rows so far to {OUTPUT_CSV}")
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""
+Batch CRI Scoring (Incremental)
+-------------------------------
+Computes the Climate Risk Index for every (point, date) in the ingested
+climate and AQI history, so the app can fetch precomputed scores instead
+of recomputing them on-device.
+
+The scoring mirrors `shannon_weight.py` and the Flutter formula
+(flutter-demo/lib/providers/cri_provider.dart):
+    1. log1p transform on precipitation_total (negatives clipped to 0)
+    2. min-max normalization with indicator_minmax.csv (clipped to [0, 1])
+    3. CRI = normalized (rows x indicators) @ entropy weights (indicators,)
+
+Incremental mode:
+    Rows already present in the scores table (keyed by point_id, date)
+    are skipped; only new days are scored and appended.
+
+Input:
+    - raw_data/ncr_*_A.csv, raw_data/ncr_*_B.csv
+    - processed_data/entropy_weights.csv
+    - processed_data/indicator_minmax.csv
+
+Output:
+    - processed_data/cri_scores.csv   (full point x date table)
+    - processed_data/cri_latest.json  (latest score per point, for the app)
+"""
+
+import json
+import os
+import numpy as np
+import pandas as pd
+
+# === CONFIGURATION ===
+SUMMARY_FILES = ["raw_data/ncr_1to6_25_A.csv", "raw_data/ncr_7to12_24_A.csv"]
+AIR_FILES = ["raw_data/ncr_1to6_25_B.csv", "raw_data/ncr_7to12_24_B.csv"]
+WEIGHTS_FILE = "processed_data/entropy_weights.csv"
+MINMAX_FILE = "processed_data/indicator_minmax.csv"
+SCORES_FILE = "processed_data/cri_scores.csv"
+LATEST_FILE = "processed_data/cri_latest.json"
+
+KEY_COLS = ["point_id", "date"]
+LOG_INDICATORS = ["precipitation_total"]
+
+
+# === HELPER FUNCTIONS ===
+def load_scoring_params(weights_file=WEIGHTS_FILE, minmax_file=MINMAX_FILE):
+    """Return (indicators, weights, mins, maxs) aligned on indicator order."""
+    weights_df = pd.read_csv(weights_file)
+    minmax_df = pd.read_csv(minmax_file).set_index("Indicator")
+    indicators = weights_df["Indicator"].tolist()
+    weights = weights_df["Weight"].to_numpy(dtype=np.float64)
+    mins = minmax_df.loc[indicators, "Min"].to_numpy(dtype=np.float64)
+    maxs = minmax_df.loc[indicators, "Max"].to_numpy(dtype=np.float64)
+    return indicators, weights, mins, maxs
+
+
+def load_history(summary_files=SUMMARY_FILES, air_files=AIR_FILES):
+    """Merge daily summary and AQI rows on (point_id, date)."""
+    summary_df = pd.concat([pd.read_csv(f) for f in summary_files], ignore_index=True)
+    air_df = pd.concat([pd.read_csv(f) for f in air_files], ignore_index=True)
+    air_df = air_df.drop(columns=["latitude", "longitude"])
+    return pd.merge(summary_df, air_df, on=KEY_COLS, how="inner")
+
+
+def score_matrix(X, indicators, weights, mins, maxs):
+    """Vectorized CRI for a (rows x indicators) matrix."""
+    X = np.array(X, dtype=np.float64)
+    for j, name in enumerate(indicators):
+        if name in LOG_INDICATORS:
+            X[:, j] = np.log1p(np.clip(X[:, j], 0, None))
+    span = np.where(maxs > mins, maxs - mins, 1.0)
+    normalized = np.clip((X - mins) / span, 0.0, 1.0)
+    # Missing indicators contribute nothing; renormalize by available weight
+    valid = ~np.isnan(normalized)
+    normalized = np.where(valid, normalized, 0.0)
+    available = valid @ weights
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(available > 0, (normalized @ weights) / available, np.nan)
+
+
+def score_frame(df, params):
+    """Append a CRI column to a merged history frame."""
+    indicators, weights, mins, maxs = params
+    out = df[KEY_COLS + ["latitude", "longitude"]].copy()
+    out["CRI"] = score_matrix(df[indicators].to_numpy(), indicators, weights, mins, maxs)
+    return out
+
+
+def update_scores(history, params, scores_file=SCORES_FILE):
+    """Score only (point_id, date) rows missing from the existing table."""
+    if os.path.exists(scores_file):
+        existing = pd.read_csv(scores_file)
+        seen = pd.MultiIndex.from_frame(existing[KEY_COLS].astype(str))
+        keys = pd.MultiIndex.from_frame(history[KEY_COLS].astype(str))
+        new_rows = history[~keys.isin(seen)]
+    else:
+        existing = None
+        new_rows = history
+
+    scored = score_frame(new_rows, params)
+    if existing is not None:
+        scored = pd.concat([existing, scored], ignore_index=True)
+    scored = scored.sort_values(KEY_COLS, kind="stable").reset_index(drop=True)
+    return scored, len(new_rows)
+
+
+def latest_scores(scores):
+    """Latest CRI per point, shaped for the app."""
+    latest = scores.dropna(subset=["CRI"]).sort_values(KEY_COLS).groupby("point_id").tail(1)
+    return {
+        row.point_id: {
+            "date": row.date,
+            "latitude": row.latitude,
+            "longitude": row.longitude,
+            "CRI": round(float(row.CRI), 4),
+        }
+        for row in latest.itertuples(index=False)
+    }
+
+
+if __name__ == "__main__":
+    # === 1. Load parameters and history ===
+    params = load_scoring_params()
+    history = load_history()
+    print(f"✅ Loaded {len(history)} (point, date) rows for {len(params[0])} indicators")
+
+    # === 2. Score new rows only ===
+    scores, n_new = update_scores(history, params)
+    print(f"✅ Scored {n_new} new rows ({len(scores)} total)")
+
+    # === 3. Save outputs ===
+    scores.to_csv(SCORES_FILE, index=False)
+    with open(LATEST_FILE, "w") as f:
+        json.dump(latest_scores(scores), f, indent=2)
+    print(f"✅ Saved {SCORES_FILE} and {LATEST_FILE}")
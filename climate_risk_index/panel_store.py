@@ -0,0 +1,162 @@
+"""
+Climate Panel Store
+-------------------
+Loads all ingested OWM data into one dense, keyed panel:
+
+    values[point, date, indicator]  (float32, NaN where missing)
+    mask[point, date, indicator]    (True where a value was observed)
+
+Rows are placed by `point_id` and `date` instead of joining on the
+API-echoed float latitude/longitude, which drift from the requested
+coordinates. Point coordinates come from the sample points file.
+
+The panel is persisted as `.npy` arrays plus a JSON index and reopened
+with memory mapping, so entropy weights, statistics and CRI scoring can
+slice it directly instead of re-concatenating and re-joining CSVs.
+
+Input:
+    - processed_data/ncr_sample_points.csv
+    - raw_data/ncr_*_A.csv (daily summary), raw_data/ncr_*_B.csv (AQI)
+    - ../flood_disruption_index/raw_data/ncr_*_C.csv with hist_base_point.csv
+      (precipitation stations, built as a separate panel)
+
+Output:
+    - processed_data/panel/{values.npy, mask.npy, index.json}
+    - ../flood_disruption_index/processed_data/precip_panel/
+"""
+
+import json
+import os
+import numpy as np
+import pandas as pd
+
+# === CONFIGURATION ===
+POINTS_FILE = "processed_data/ncr_sample_points.csv"
+SOURCES = {
+    "summary": ["raw_data/ncr_1to6_25_A.csv", "raw_data/ncr_7to12_24_A.csv"],
+    "air": ["raw_data/ncr_1to6_25_B.csv", "raw_data/ncr_7to12_24_B.csv"],
+}
+PANEL_DIR = "processed_data/panel"
+
+FDI_POINTS_FILE = "../flood_disruption_index/processed_data/hist_base_point.csv"
+FDI_PRECIP_FILES = ["../flood_disruption_index/raw_data/ncr_1to6_25_C.csv",
+                    "../flood_disruption_index/raw_data/ncr_7to12_24_C.csv"]
+FDI_PANEL_DIR = "../flood_disruption_index/processed_data/precip_panel"
+NON_INDICATOR_COLS = {"point_id", "latitude", "longitude", "date"}
+
+
+class Panel:
+    """Dense (point x date x indicator) panel with O(1) keyed lookups."""
+
+    def __init__(self, values, mask, points, dates, indicators, coords=None):
+        self.values = values
+        self.mask = mask
+        self.points = list(points)
+        self.dates = list(dates)
+        self.indicators = list(indicators)
+        self.coords = coords or {}
+        self._p = {p: i for i, p in enumerate(self.points)}
+        self._d = {d: i for i, d in enumerate(self.dates)}
+        self._i = {name: i for i, name in enumerate(self.indicators)}
+
+    # === LOOKUPS ===
+    def get(self, point_id, date, indicator):
+        """Single cell, or NaN when missing."""
+        return self.values[self._p[point_id], self._d[date], self._i[indicator]]
+
+    def indicator(self, name):
+        """(points x dates) view of one indicator."""
+        return self.values[:, :, self._i[name]]
+
+    def point(self, point_id):
+        """(dates x indicators) view of one point."""
+        return self.values[self._p[point_id]]
+
+    def complete_rows(self, indicators):
+        """
+        (rows x indicators) matrix of every (point, date) where all requested
+        indicators were observed, plus the matching (point_idx, date_idx) keys.
+        """
+        cols = [self._i[name] for name in indicators]
+        present = np.asarray(self.mask[:, :, cols]).all(axis=2)
+        p_idx, d_idx = np.nonzero(present)
+        return np.asarray(self.values[p_idx, d_idx][:, cols], dtype=np.float64), p_idx, d_idx
+
+    def to_frame(self, indicators=None):
+        """Long DataFrame (point_id, date, indicators...) of observed rows."""
+        indicators = indicators or self.indicators
+        X, p_idx, d_idx = self.complete_rows(indicators)
+        df = pd.DataFrame(X, columns=indicators)
+        df.insert(0, "date", np.asarray(self.dates, dtype=object)[d_idx])
+        df.insert(0, "point_id", np.asarray(self.points, dtype=object)[p_idx])
+        return df
+
+    # === PERSISTENCE ===
+    def save(self, panel_dir=PANEL_DIR):
+        os.makedirs(panel_dir, exist_ok=True)
+        np.save(os.path.join(panel_dir, "values.npy"), np.asarray(self.values, dtype=np.float32))
+        np.save(os.path.join(panel_dir, "mask.npy"), np.asarray(self.mask, dtype=bool))
+        with open(os.path.join(panel_dir, "index.json"), "w") as f:
+            json.dump({"points": self.points, "dates": self.dates,
+                       "indicators": self.indicators, "coords": self.coords}, f, indent=2)
+
+    @classmethod
+    def load(cls, panel_dir=PANEL_DIR, mmap_mode="r"):
+        values = np.load(os.path.join(panel_dir, "values.npy"), mmap_mode=mmap_mode)
+        mask = np.load(os.path.join(panel_dir, "mask.npy"), mmap_mode=mmap_mode)
+        with open(os.path.join(panel_dir, "index.json"), "r") as f:
+            index = json.load(f)
+        return cls(values, mask, index["points"], index["dates"],
+                   index["indicators"], index.get("coords"))
+
+
+# === INGEST ===
+def build_panel(sources=SOURCES, points_file=POINTS_FILE):
+    """Scatter every source file into one dense panel keyed by (point_id, date)."""
+    frames = []
+    indicators = []
+    for files in sources.values():
+        df = pd.concat([pd.read_csv(f) for f in files], ignore_index=True)
+        cols = [c for c in df.columns if c not in NON_INDICATOR_COLS and c not in indicators]
+        indicators += cols
+        frames.append((df, cols))
+
+    points_df = pd.read_csv(points_file)
+    point_ids = list(points_df["Point_ID"])
+    extra = sorted({p for df, _ in frames for p in df["point_id"].unique()} - set(point_ids))
+    point_ids += extra
+    dates = sorted({str(d) for df, _ in frames for d in df["date"].unique()})
+    coords = {
+        row.Point_ID: [row.Latitude, row.Longitude]
+        for row in points_df.itertuples(index=False)
+    }
+
+    p_index = pd.Index(point_ids)
+    d_index = pd.Index(dates)
+    i_index = pd.Index(indicators)
+    values = np.full((len(point_ids), len(dates), len(indicators)), np.nan, dtype=np.float32)
+
+    for df, cols in frames:
+        p = p_index.get_indexer(df["point_id"])
+        d = d_index.get_indexer(df["date"].astype(str))
+        i = i_index.get_indexer(cols)
+        block = df[cols].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float32)
+        # Later files win on duplicate keys, like a keyed upsert
+        values[p[:, None], d[:, None], i[None, :]] = block
+
+    mask = ~np.isnan(values)
+    return Panel(values, mask, point_ids, dates, indicators, coords)
+
+
+if __name__ == "__main__":
+    # === 1. CRI panel (daily summary + AQI) ===
+    panel = build_panel()
+    panel.save()
+    print(f"✅ CRI panel {panel.values.shape} (points x dates x indicators) saved to {PANEL_DIR}/")
+    print(f"   Observed cells: {int(panel.mask.sum())} / {panel.mask.size}")
+
+    # === 2. FDI precipitation panel (its stations reuse the P01.. IDs at other coordinates) ===
+    if all(os.path.exists(f) for f in FDI_PRECIP_FILES):
+        precip_panel = build_panel({"precip": FDI_PRECIP_FILES}, FDI_POINTS_FILE)
+        precip_panel.save(FDI_PANEL_DIR)
+        print(f"✅ Precipitation panel {precip_panel.values.shape} saved to {FDI_PANEL_DIR}/")
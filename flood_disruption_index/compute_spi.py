@@ -1,31 +1,26 @@
 import pandas as pd
 import re
 
-# === 1. Load datasets ===
-df = pd.read_csv("processed_data/ncr_synthetic_precip.csv")
+# === CONFIGURATION ===
+PRECIP_FILE = "processed_data/ncr_synthetic_precip.csv"
+STATS_FILE = "processed_data/ncr_regional_stats.txt"
+OUTPUT_FILE = "processed_data/ncr_synthetic_SPI.csv"
 
-# === 2. Read regional mean (μ) and std (σ) from text file ===
-with open("processed_data/ncr_regional_stats.txt", "r") as f:
-    content = f.read()
 
-mu_match = re.search(r"Regional mean \(μ\): ([0-9.]+)", content)
-sigma_match = re.search(r"Regional std \(σ\): ([0-9.]+)", content)
+# === 1. Read regional mean (μ) and std (σ) from text file ===
+def load_regional_stats(stats_file=STATS_FILE):
+    with open(stats_file, "r") as f:
+        content = f.read()
 
-mu = float(mu_match.group(1)) if mu_match else None
-sigma = float(sigma_match.group(1)) if sigma_match else None
+    mu_match = re.search(r"Regional mean \(μ\): ([0-9.]+)", content)
+    sigma_match = re.search(r"Regional std \(σ\): ([0-9.]+)", content)
 
-print(f"Using μ = {mu:.3f}, σ = {sigma:.3f}")
+    mu = float(mu_match.group(1)) if mu_match else None
+    sigma = float(sigma_match.group(1)) if sigma_match else None
+    return mu, sigma
 
-# === 3. Compute SPI ===
-# Formula: SPI = (precip - μ) / σ
-df["SPI"] = (df["precipitation_total"] - mu) / sigma
 
-# === 4. Normalize SPI to [0, 1] for fuzzy fusion ===
-# Clip to [-3, 3] range to avoid extreme outliers
-df["SPI_norm"] = df["SPI"].clip(-3, 3)
-df["SPI_norm"] = (df["SPI_norm"] + 3) / 6  # shifts to [0, 1]
-
-# === 5. Optional: classify qualitative SPI bins (for interpretability) ===
+# === 2. Optional: classify qualitative SPI bins (for interpretability) ===
 def classify_spi(x):
     if x < -1.5:
         return "dry"
@@ -38,10 +33,33 @@ def classify_spi(x):
     else:
         return "very_wet"
 
-df["SPI_class"] = df["SPI"].apply(classify_spi)
 
-# === 6. Save output ===
-df.to_csv("processed_data/ncr_synthetic_SPI.csv", index=False)
+def compute_spi(df, mu, sigma):
+    """Add SPI, SPI_norm and SPI_class columns to a precipitation frame."""
+    df = df.copy()
+    # Formula: SPI = (precip - μ) / σ
+    df["SPI"] = (df["precipitation_total"] - mu) / sigma
+
+    # Normalize SPI to [0, 1] for fuzzy fusion
+    # Clip to [-3, 3] range to avoid extreme outliers
+    df["SPI_norm"] = df["SPI"].clip(-3, 3)
+    df["SPI_norm"] = (df["SPI_norm"] + 3) / 6  # shifts to [0, 1]
+
+    df["SPI_class"] = df["SPI"].apply(classify_spi)
+    return df
+
+
+if __name__ == "__main__":
+    # === 3. Load datasets ===
+    df = pd.read_csv(PRECIP_FILE)
+    mu, sigma = load_regional_stats()
+    print(f"Using μ = {mu:.3f}, σ = {sigma:.3f}")
+
+    # === 4. Compute SPI ===
+    df = compute_spi(df, mu, sigma)
+
+    # === 5. Save output ===
+    df.to_csv(OUTPUT_FILE, index=False)
 
-print("\n✅ Saved 'ncr_synthetic_SPI.csv' with SPI and normalized SPI values.")
-print(df.head())
\ No newline at end of file
+    print("\n✅ Saved 'ncr_synthetic_SPI.csv' with SPI and normalized SPI values.")
+    print(df.head())
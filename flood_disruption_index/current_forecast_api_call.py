@@ -10,13 +10,18 @@ Endpoint:
 Output:
     A CSV file with precipitation data per coordinate and timestamp.
     Columns: point_id, latitude, longitude, timestamp, precipitation_total, source
+    Forecast rows are stamped with their own hour (valid time).
+
+    Each pull is also stored in the fixed-size forecast history
+    (forecast_history.py), which tracks forecast skill per lead hour.
 """
 
 import os
 import pandas as pd
 import requests
-import time
 from datetime import UTC, datetime
+from forecast_history import ForecastHistory, to_hour
+from owm_quota import PRIORITY_LIVE, QuotaBroker, QuotaExhausted
 
 # === CONFIGURATION ===
 API_KEY = os.getenv("OWM_API_KEY")
@@ -28,73 +33,91 @@ points = pd.read_csv(INPUT_CSV)
 print(f"Loaded {len(points)} coordinates from {INPUT_CSV}")
 
 # === STORAGE ===
+broker = QuotaBroker()
 records = []
 
 # === MAIN LOOP ===
-for _, row in points.iterrows():
-    lat = row["Latitude"]
-    lon = row["Longitude"]
-    point_id = row["Point_ID"]
-
-    url = (
-        f"https://api.openweathermap.org/data/3.0/onecall?"
-        f"lat={lat}&lon={lon}&appid={API_KEY}&units=metric&exclude=minutely,daily,alerts"
-    )
-
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-
-        # === CURRENT PRECIPITATION ===
-        current = data.get("current", {})
-        current_precip = 0.0
-        if "rain" in current:
-            current_precip = current["rain"].get("1h", 0.0)
-        elif "snow" in current:
-            current_precip = current["snow"].get("1h", 0.0)
-
-        records.append({
-            "point_id": point_id,
-            "latitude": lat,
-            "longitude": lon,
-            "timestamp": datetime.fromtimestamp(current.get("dt", 0), UTC).isoformat(),
-            "precipitation_total": current_precip,
-            "source": "current"
-        })
-        print(f"✅ Current data fetched for {point_id}")
-
-        # === HOURLY FORECAST PRECIPITATION ===
-        hourly_data = data.get("hourly", [])
-        for hour in hourly_data:
-            precip = 0.0
-            if "rain" in hour:
-                precip = hour["rain"].get("1h", 0.0)
-            elif "snow" in hour:
-                precip = hour["snow"].get("1h", 0.0)
+try:
+    for _, row in points.iterrows():
+        lat = row["Latitude"]
+        lon = row["Longitude"]
+        point_id = row["Point_ID"]
+
+        url = (
+            f"https://api.openweathermap.org/data/3.0/onecall?"
+            f"lat={lat}&lon={lon}&appid={API_KEY}&units=metric&exclude=minutely,daily,alerts"
+        )
+
+        try:
+            broker.acquire(PRIORITY_LIVE)
+            response = requests.get(url)
+            response.raise_for_status()
+            data = response.json()
+
+            # === CURRENT PRECIPITATION ===
+            current = data.get("current", {})
+            current_precip = 0.0
+            if "rain" in current:
+                current_precip = current["rain"].get("1h", 0.0)
+            elif "snow" in current:
+                current_precip = current["snow"].get("1h", 0.0)
 
             records.append({
                 "point_id": point_id,
                 "latitude": lat,
                 "longitude": lon,
-               "timestamp": datetime.fromtimestamp(current.get("dt", 0), UTC).isoformat(),
-                "precipitation_total": precip,
-                "source": "forecast"
+                "timestamp": datetime.fromtimestamp(current.get("dt", 0), UTC).isoformat(),
+                "precipitation_total": current_precip,
+                "source": "current"
             })
-
-        print(f"🌧 Forecast data (48h) fetched for {point_id}")
-
-    except requests.exceptions.RequestException as e:
-        print(f"⚠️ Error fetching data for {point_id}: {e}")
-
-    # Respect OWM rate limits (~60 requests/min)
-    time.sleep(1)
+            print(f"✅ Current data fetched for {point_id}")
+
+            # === HOURLY FORECAST PRECIPITATION ===
+            hourly_data = data.get("hourly", [])
+            for hour in hourly_data:
+                precip = 0.0
+                if "rain" in hour:
+                    precip = hour["rain"].get("1h", 0.0)
+                elif "snow" in hour:
+                    precip = hour["snow"].get("1h", 0.0)
+
+                records.append({
+                    "point_id": point_id,
+                    "latitude": lat,
+                    "longitude": lon,
+                    "timestamp": datetime.fromtimestamp(hour.get("dt", 0), UTC).isoformat(),
+                    "precipitation_total": precip,
+                    "source": "forecast"
+                })
+
+            print(f"🌧 Forecast data (48h) fetched for {point_id}")
+
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️ Error fetching data for {point_id}: {e}")
+except (QuotaExhausted, TimeoutError) as e:
+    print(f"⚠️ OWM quota: {e}. Saving the points fetched so far.")
 
 # === SAVE RESULTS ===
 df = pd.DataFrame(records)
+if df.empty:
+    # Keep the previous pull rather than replacing it with zero rows
+    raise SystemExit(f"❌ No points fetched; {OUTPUT_CSV} left unchanged")
 df.to_csv(OUTPUT_CSV, index=False)
 print(f"\n✅ Data collection complete! Saved to {OUTPUT_CSV}")
 
+# === FORECAST HISTORY ===
+epoch_s = (pd.to_datetime(df["timestamp"], utc=True, format="ISO8601") - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)
+current_rows = df["source"] == "current"
+forecast_rows = df["source"] == "forecast"
+if current_rows.any():
+    history = ForecastHistory.load_or_create(points["Point_ID"])
+    issue_hour = int(to_hour(epoch_s[current_rows]).max())
+    history.push_observed(issue_hour, df.loc[current_rows, "point_id"], df.loc[current_rows, "precipitation_total"])
+    history.push_forecast(issue_hour, df.loc[forecast_rows, "point_id"],
+                          to_hour(epoch_s[forecast_rows]), df.loc[forecast_rows, "precipitation_total"])
+    history.save()
+    print(f"✅ Forecast history updated (horizon trusted up to +{history.trusted_horizon()} h)")
+
 # === Optional Summary ===
 print("\n--- Summary ---")
 print(df["source"].value_counts())
\ No newline at end of file
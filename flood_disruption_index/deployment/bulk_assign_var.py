@@ -0,0 +1,128 @@
+"""
+Bulk Route Var Assignment (Streaming, Multi-Process)
+----------------------------------------------------
+Bulk job mode of check_points.py + prune_points.py for fleet-wide route
+logs of millions of points.
+
+- Streams the input CSV in fixed-size chunks (flat memory)
+- Shards chunks across forked worker processes that share the hazard
+  STRtree built once in the parent; only a few chunks per worker are in
+  flight at a time
+- Applies the prune predicate (Var != 0) inline, so one pass writes either
+  the full table or only the non-zero rows
+- With --proximity, adds Var_near (distance-decayed Var, see
+  hazard_index.py) and the prune also keeps near misses
+  (Var_near ≥ NEAR_MISS_MIN_VAR)
+
+Usage:
+    python bulk_assign_var.py [--input simplified_routes.csv]
+                              [--output simplified_routes_with_var.csv]
+                              [--workers 4] [--chunk-size 200000]
+                              [--nonzero-only] [--proximity]
+"""
+
+import argparse
+import os
+from collections import deque
+from multiprocessing import get_context
+import pandas as pd
+from hazard_config import NEAR_MISS_MIN_VAR
+from hazard_index import GEOJSON_FILE, HazardIndex
+
+# === CONFIGURATION ===
+SIMPLIFIED_ROUTES_FILE = "simplified_routes.csv"
+OUTPUT_FILE = "simplified_routes_with_var.csv"
+CHUNK_SIZE = 200_000
+WORKERS = os.cpu_count() or 1
+
+FIELDNAMES = ["route_name", "distance_km", "duration_min", "lat", "lon", "order", "Var"]
+
+IN_FLIGHT_PER_WORKER = 2  # chunks queued per worker; bounds memory to a few chunks
+
+_hazard_index = None
+
+
+# === WORKER ===
+def _load_index(geojson_file):
+    """Build the hazard index once in the parent; forked workers inherit it."""
+    global _hazard_index
+    _hazard_index = HazardIndex.from_geojson(geojson_file)
+
+
+def assign_chunk(args):
+    """Assign Var (and Var_near) to one chunk and optionally drop Var == 0 rows."""
+    chunk, nonzero_only, proximity = args
+    n_in = len(chunk)
+    lons, lats = chunk["lon"].to_numpy(), chunk["lat"].to_numpy()
+    pairs = _hazard_index.intersect_pairs(lons, lats)  # one point test for Var and Var_near
+    chunk["Var"] = _hazard_index.highest_var(lons, lats, pairs).astype(int)
+    keep = chunk["Var"] != 0
+    if proximity:
+        _, _, var_near = _hazard_index.proximity_exposure(lons, lats, pairs=pairs)
+        chunk["Var_near"] = var_near.round(3)
+        keep |= chunk["Var_near"] >= NEAR_MISS_MIN_VAR
+    if nonzero_only:
+        chunk = chunk[keep]
+    return n_in, chunk[FIELDNAMES + (["Var_near"] if proximity else [])]
+
+
+def _bounded_imap(pool, fn, jobs, max_in_flight):
+    """Ordered results of fn over jobs with at most max_in_flight jobs submitted."""
+    pending = deque()
+    for job in jobs:
+        pending.append(pool.apply_async(fn, (job,)))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def run_bulk(input_file, output_file, geojson_file=GEOJSON_FILE,
+             workers=WORKERS, chunk_size=CHUNK_SIZE, nonzero_only=False, proximity=False):
+    """Stream input_file through the workers into output_file in one pass.
+
+    Returns (rows read, rows written).
+    """
+    _load_index(geojson_file)
+    reader = pd.read_csv(input_file, chunksize=chunk_size)
+    jobs = ((chunk, nonzero_only, proximity) for chunk in reader)
+    n_in = n_out = 0
+
+    with open(output_file, "w", newline="") as f:
+        f.write(",".join(FIELDNAMES + (["Var_near"] if proximity else [])) + "\n")
+        if workers <= 1:
+            results = map(assign_chunk, jobs)
+            pool = None
+        else:
+            # fork so every worker shares the parent's index instead of rebuilding it
+            pool = get_context("fork").Pool(workers)
+            results = _bounded_imap(pool, assign_chunk, jobs, workers * IN_FLIGHT_PER_WORKER)
+        try:
+            for chunk_in, chunk in results:
+                n_in += chunk_in
+                n_out += len(chunk)
+                chunk.to_csv(f, header=False, index=False)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+    return n_in, n_out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk Var assignment for route points")
+    parser.add_argument("--input", default=SIMPLIFIED_ROUTES_FILE)
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    parser.add_argument("--geojson", default=GEOJSON_FILE)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--nonzero-only", action="store_true",
+                        help="emit only rows with Var != 0 (inline prune_points.py)")
+    parser.add_argument("--proximity", action="store_true",
+                        help="add Var_near and keep near-miss points when pruning")
+    args = parser.parse_args()
+
+    n_in, n_out = run_bulk(args.input, args.output, args.geojson,
+                           args.workers, args.chunk_size, args.nonzero_only, args.proximity)
+    print(f"✅ Processed {n_in} route points, wrote {n_out} rows to {args.output}")
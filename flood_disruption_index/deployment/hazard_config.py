@@ -0,0 +1,13 @@
+"""
+Hazard Proximity Settings
+-------------------------
+Constants of the proximity mode in hazard_index.py, kept in a module with
+no dependencies so light scripts (prune_points.py) can read them without
+loading shapely or scipy.
+"""
+
+# === CONFIGURATION ===
+PROXIMITY_MAX_M = 300
+PROXIMITY_SPACING_M = 10.0
+DECAY_M = {1.0: 50.0, 2.0: 100.0, 3.0: 150.0}  # higher hazards reach further
+NEAR_MISS_MIN_VAR = 0.5  # Var 3 within ~270 m, Var 2 within ~140 m, Var 1 within ~35 m
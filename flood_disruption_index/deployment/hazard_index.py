@@ -0,0 +1,128 @@
+"""
+Hazard Index
+------------
+Vectorized lookup of Project NOAH hazard levels (Var) for route points.
+
+The hazard polygons are loaded once into an STRtree; point batches are
+then matched against it in a single bulk query instead of testing every
+polygon for every point (see `get_highest_var` in check_points.py).
+
+Proximity mode: points just outside a polygon still count. Polygon
+boundaries are projected to a local equirectangular plane (meters),
+densified every PROXIMITY_SPACING_M and indexed in one KD-tree per Var
+class; a bounded nearest query (distance_upper_bound = max distance) gives
+the distance to the nearest polygon of each class, within half the vertex
+spacing. Points inside a polygon of the class have d = 0. Exposure decays
+as exp(-d / decay_m[Var]) and is 0 beyond the maximum distance; the
+effective Var (Var_near) of a point is max over classes of Var · exposure.
+Points with Var 0 but Var_near ≥ NEAR_MISS_MIN_VAR are near misses.
+Settings live in hazard_config.py.
+
+`intersect_pairs` runs the STRtree point test once; pass its result as
+`pairs` to both `highest_var` and `proximity_exposure` to reuse it.
+"""
+
+import json
+import numpy as np
+import shapely
+from scipy.spatial import cKDTree
+from shapely import STRtree, points as make_points
+from shapely.geometry import shape
+from hazard_config import DECAY_M, PROXIMITY_MAX_M, PROXIMITY_SPACING_M
+
+# === CONFIGURATION ===
+GEOJSON_FILE = "../raw_data/ncr_noah.geojson"
+EARTH_RADIUS_M = 6371000
+
+
+def load_hazard_polygons(geojson_file=GEOJSON_FILE):
+    """Return (geometries, vars) for every feature with a Var property."""
+    with open(geojson_file, "r") as f:
+        geojson_data = json.load(f)
+
+    geoms, var_values = [], []
+    for feature in geojson_data["features"]:
+        var_value = feature["properties"].get("Var", None)
+        if var_value is None:
+            continue
+        geoms.append(shape(feature["geometry"]))
+        var_values.append(var_value)
+    return np.array(geoms, dtype=object), np.asarray(var_values, dtype=np.float64)
+
+
+class HazardIndex:
+    """STRtree over hazard polygons with a bulk highest-Var query."""
+
+    def __init__(self, geoms, var_values):
+        self.geoms = geoms
+        self.var_values = var_values
+        self.tree = STRtree(geoms)
+        self._proximity = None
+
+    @classmethod
+    def from_geojson(cls, geojson_file=GEOJSON_FILE):
+        return cls(*load_hazard_polygons(geojson_file))
+
+    def intersect_pairs(self, lons, lats):
+        """(point index, polygon index) of every point lying in a polygon."""
+        pts = make_points(np.asarray(lons, dtype=np.float64), np.asarray(lats, dtype=np.float64))
+        return self.tree.query(pts, predicate="intersects")
+
+    def highest_var(self, lons, lats, pairs=None):
+        """Highest Var of any polygon intersecting each point (0 if none)."""
+        pt_idx, poly_idx = self.intersect_pairs(lons, lats) if pairs is None else pairs
+        result = np.zeros(len(np.atleast_1d(lons)), dtype=np.float64)
+        np.maximum.at(result, pt_idx, self.var_values[poly_idx])
+        return result
+
+    # === PROXIMITY ===
+    def _project(self, lons, lats):
+        """Local equirectangular meters around the hazard layer's mean latitude."""
+        k = np.pi / 180 * EARTH_RADIUS_M
+        return np.asarray(lons, dtype=np.float64) * k * self._cos_ref, np.asarray(lats, dtype=np.float64) * k
+
+    def _proximity_trees(self):
+        """Per-Var KD-trees over densified projected polygon boundaries, built on first use."""
+        if self._proximity is None:
+            bounds = shapely.bounds(self.geoms)
+            self._cos_ref = np.cos(np.radians(np.mean(bounds[:, [1, 3]])))
+            projected = shapely.transform(self.geoms, lambda c: np.column_stack(self._project(c[:, 0], c[:, 1])))
+            boundaries = shapely.segmentize(shapely.boundary(projected), PROXIMITY_SPACING_M)
+            self._proximity = {
+                v: cKDTree(shapely.get_coordinates(boundaries[self.var_values == v]))
+                for v in np.unique(self.var_values) if v > 0
+            }
+        return self._proximity
+
+    def nearest_distances(self, lons, lats, max_distance_m=PROXIMITY_MAX_M, pairs=None):
+        """
+        Distance (m) from each point to the nearest polygon of every Var
+        class (0 inside), inf when none lies within max_distance_m.
+        Returns (vars, distances of shape (n_points, n_vars)).
+        """
+        trees = self._proximity_trees()
+        vars_ = np.array(sorted(trees), dtype=np.float64)
+        xy = np.column_stack(self._project(lons, lats))
+        dist = np.full((len(xy), len(vars_)), np.inf)
+        for j, v in enumerate(vars_):
+            dist[:, j], _ = trees[v].query(xy, distance_upper_bound=max_distance_m)
+
+        pt_idx, poly_idx = self.intersect_pairs(lons, lats) if pairs is None else pairs
+        col = np.searchsorted(vars_, self.var_values[poly_idx])
+        keep = (col < len(vars_)) & (vars_[np.minimum(col, len(vars_) - 1)] == self.var_values[poly_idx])
+        dist[pt_idx[keep], col[keep]] = 0.0
+        return vars_, dist
+
+    def proximity_exposure(self, lons, lats, max_distance_m=PROXIMITY_MAX_M, decay_m=None, pairs=None):
+        """
+        Distance-decayed exposure per Var class in [0, 1] and the effective
+        Var (max over classes of Var · exposure), which is at least the
+        point's own Var.
+        Returns (vars, exposure of shape (n_points, n_vars), effective_var).
+        """
+        decay_m = DECAY_M if decay_m is None else decay_m
+        vars_, dist = self.nearest_distances(lons, lats, max_distance_m, pairs)
+        scale = np.array([decay_m.get(v, max(decay_m.values())) for v in vars_])
+        exposure = np.where(np.isfinite(dist), np.exp(-dist / scale), 0.0)
+        effective = (exposure * vars_).max(axis=1) if len(vars_) else np.zeros(len(dist))
+        return vars_, exposure, effective
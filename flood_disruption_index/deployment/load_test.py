@@ -0,0 +1,227 @@
+"""
+Route-Risk Backend Load Test
+----------------------------
+Measures how many concurrent rider route requests the Python backend
+(route_pipeline.py) sustains, without touching the real APIs.
+
+- Starts local stub Mapbox Directions and OWM One Call servers that replay
+  recorded responses with configurable latency (and optional error rate)
+- Drives RoutePipeline from N concurrent workers for a fixed duration using
+  a weighted request mix
+- Reports p50 / p95 / p99 latency, throughput and error rate per request
+  kind plus the shared Var / forecast memo hit rates, saves them as JSON,
+  and compares against the previous saved run
+
+Recorded responses are read from RECORDING_DIR; if missing, they are
+synthesized from simplified_routes.csv.
+
+Usage:
+    python load_test.py [--concurrency 16] [--duration 30] [--latency-ms 120]
+                        [--jitter-ms 40] [--error-rate 0.0] [--geojson ...]
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+import polyline
+from coord_memo import LRUMemo, QuantizedLookup
+from hazard_index import GEOJSON_FILE, HazardIndex
+from route_pipeline import RoutePipeline
+from route_ranking import RouteRanker, load_cri_fn
+
+# === CONFIGURATION ===
+RECORDING_DIR = "load_test_data"
+RESULTS_DIR = "load_test_results"
+ROUTES_FILE = "simplified_routes.csv"
+
+# Weighted request mix: (kind, origin, destination, with_forecast, weight)
+REQUEST_MIX = [
+    ("UP-Ateneo", (14.65728, 121.064451), (14.640998, 121.077131), False, 0.6),
+    ("UP-Ateneo+forecast", (14.65728, 121.064451), (14.640998, 121.077131), True, 0.3),
+    ("Ateneo-UP+forecast", (14.640998, 121.077131), (14.65728, 121.064451), True, 0.1),
+]
+
+
+# === RECORDED RESPONSES ===
+def synthesize_recordings(routes_file=ROUTES_FILE):
+    """Build Mapbox- and OWM-shaped responses from the saved simplified routes."""
+    df = pd.read_csv(routes_file)
+    routes = []
+    for name, grp in df.groupby("route_name", sort=False):
+        coords = list(zip(grp["lat"], grp["lon"]))
+        routes.append({
+            "distance": float(grp["distance_km"].iloc[0]) * 1000,
+            "duration": float(grp["duration_min"].iloc[0]) * 60,
+            "geometry": polyline.encode(coords, precision=6),
+            "legs": [{"steps": [{"name": name.removeprefix("via ")}]}],
+        })
+    mapbox = {"code": "Ok", "routes": routes}
+    now = int(time.time())
+    owm = {
+        "current": {"dt": now, "rain": {"1h": 0.4}},
+        "hourly": [{"dt": now + 3600 * h, "rain": {"1h": round(0.2 * (h % 5), 2)}} for h in range(48)],
+    }
+    return mapbox, owm
+
+
+def load_recordings():
+    mapbox_path = os.path.join(RECORDING_DIR, "mapbox_directions.json")
+    owm_path = os.path.join(RECORDING_DIR, "owm_onecall.json")
+    if os.path.exists(mapbox_path) and os.path.exists(owm_path):
+        with open(mapbox_path) as f:
+            mapbox = json.load(f)
+        with open(owm_path) as f:
+            owm = json.load(f)
+        return mapbox, owm
+    print(f"⚠️ No recordings in {RECORDING_DIR}/, synthesizing from {ROUTES_FILE}")
+    return synthesize_recordings()
+
+
+# === STUB SERVERS ===
+def start_stub_server(body, latency_ms, jitter_ms, error_rate):
+    """Serve one recorded JSON body on a background thread; returns (server, base_url)."""
+    payload = json.dumps(body).encode("utf-8")
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(max(0.0, random.gauss(latency_ms, jitter_ms)) / 1000)
+            if random.random() < error_rate:
+                self.send_response(500)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+# === DRIVER ===
+def run_load(pipeline_factory, concurrency, duration_s, mix=REQUEST_MIX, seed=0):
+    """Drive the pipeline until the deadline; returns {kind: [(latency_s, ok)]}."""
+    samples = defaultdict(list)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration_s
+    kinds = [m[0] for m in mix]
+    weights = [m[4] for m in mix]
+    by_kind = {m[0]: m for m in mix}
+
+    def worker(worker_id):
+        rng = random.Random(seed + worker_id)
+        pipeline = pipeline_factory()
+        local = []
+        while time.perf_counter() < deadline:
+            kind = rng.choices(kinds, weights)[0]
+            _, origin, destination, with_forecast, _ = by_kind[kind]
+            start = time.perf_counter()
+            try:
+                pipeline.handle(origin, destination, with_forecast=with_forecast)
+                ok = True
+            except Exception:
+                ok = False
+            local.append((kind, time.perf_counter() - start, ok))
+        with lock:
+            for kind, latency, ok in local:
+                samples[kind].append((latency, ok))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    return samples
+
+
+def summarize(samples, duration_s):
+    """Latency percentiles (ms), throughput (req/s) and error rate per kind and overall."""
+    def stats(rows):
+        lat = np.array([r[0] for r in rows]) * 1000
+        ok = np.array([r[1] for r in rows])
+        if not len(lat):
+            return {"requests": 0}
+        return {
+            "requests": int(len(lat)),
+            "throughput_rps": round(len(lat) / duration_s, 2),
+            "error_rate": round(float(1 - ok.mean()), 4),
+            "p50_ms": round(float(np.percentile(lat, 50)), 2),
+            "p95_ms": round(float(np.percentile(lat, 95)), 2),
+            "p99_ms": round(float(np.percentile(lat, 99)), 2),
+        }
+
+    summary = {kind: stats(rows) for kind, rows in samples.items()}
+    summary["overall"] = stats([r for rows in samples.values() for r in rows])
+    return summary
+
+
+def previous_result():
+    files = sorted(glob.glob(os.path.join(RESULTS_DIR, "loadtest_*.json")))
+    if not files:
+        return None
+    with open(files[-1]) as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the route-risk backend against local stubs")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--latency-ms", type=float, default=120.0, help="stub mean latency")
+    parser.add_argument("--jitter-ms", type=float, default=40.0, help="stub latency std. dev.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stub HTTP 500 probability")
+    parser.add_argument("--geojson", default=GEOJSON_FILE)
+    args = parser.parse_args()
+
+    # === 1. Stubs and shared hazard index ===
+    mapbox_body, owm_body = load_recordings()
+    mapbox_server, mapbox_url = start_stub_server(mapbox_body, args.latency_ms, args.jitter_ms, args.error_rate)
+    owm_server, owm_url = start_stub_server(owm_body, args.latency_ms, args.jitter_ms, args.error_rate)
+    hazard_index = HazardIndex.from_geojson(args.geojson)
+    var_lookup = QuantizedLookup(lambda lats, lons: hazard_index.highest_var(lons, lats))
+    forecast_memo = LRUMemo()
+    ranker = RouteRanker(hazard_index, cri_fn=load_cri_fn())
+    print(f"✅ Stubs up: Mapbox {mapbox_url}, OWM {owm_url}")
+
+    # === 2. Drive load ===
+    print(f"🚦 {args.concurrency} workers for {args.duration:.0f}s...")
+    samples = run_load(
+        lambda: RoutePipeline(hazard_index, mapbox_url=mapbox_url + "/directions", owm_url=owm_url + "/onecall",
+                              var_lookup=var_lookup, forecast_memo=forecast_memo, ranker=ranker),
+        args.concurrency, args.duration,
+    )
+    mapbox_server.shutdown()
+    owm_server.shutdown()
+
+    # === 3. Report and save ===
+    summary = summarize(samples, args.duration)
+    print(pd.DataFrame(summary).T.to_string())
+    memo = {"hazard_var": var_lookup.stats(), "forecast": forecast_memo.stats()}
+    for name, st in memo.items():
+        print(f"🧠 {name} memo: hit rate {st['hit_rate']:.1%} ({st['hits']} hits, {st['misses']} misses, size {st['size']})")
+
+    prev = previous_result()
+    if prev:
+        before, after = prev["summary"]["overall"], summary["overall"]
+        print(f"\n📈 vs {prev['started_at']}: throughput {before.get('throughput_rps')} → "
+              f"{after.get('throughput_rps')} rps, p95 {before.get('p95_ms')} → {after.get('p95_ms')} ms")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    started_at = datetime.now().strftime("%Y%m%dT%H%M%S")
+    out_path = os.path.join(RESULTS_DIR, f"loadtest_{started_at}.json")
+    with open(out_path, "w") as f:
+        json.dump({"started_at": started_at, "config": vars(args), "summary": summary, "memo": memo}, f, indent=2)
+    print(f"\n✅ Saved results to {out_path}")
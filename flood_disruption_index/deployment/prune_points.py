@@ -1,4 +1,5 @@
 import csv
+from hazard_config import NEAR_MISS_MIN_VAR
 
 # === CONFIG ===
 INPUT_FILE = "simplified_routes_with_var.csv"
@@ -8,13 +9,16 @@ OUTPUT_FILE = "simplified_routes_pruned.csv"
 points = []
 with open(INPUT_FILE, "r") as f:
     reader = csv.DictReader(f)
+    proximity = "Var_near" in reader.fieldnames
     for row in reader:
-        # Keep row if Var is not 0
-        if float(row["Var"]) != 0:
+        # Keep row if Var is not 0, or if it is a near miss (bulk_assign_var.py --proximity)
+        if float(row["Var"]) != 0 or (proximity and float(row["Var_near"]) >= NEAR_MISS_MIN_VAR):
             points.append(row)
 
 # === 2. Save pruned CSV ===
 fieldnames = ["route_name", "distance_km", "duration_min", "lat", "lon", "order", "Var"]
+if proximity:
+    fieldnames.append("Var_near")
 with open(OUTPUT_FILE, "w", newline="") as f:
     writer = csv.DictWriter(f, fieldnames=fieldnames)
     writer.writeheader()
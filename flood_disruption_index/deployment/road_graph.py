@@ -0,0 +1,334 @@
+"""
+Offline Hazard-Aware Routing
+----------------------------
+Routes between two coordinates on a local OpenStreetMap road graph, without
+calling the Mapbox Directions API.
+
+Build (once per OSM extract):
+    - Drivable ways are read from an `.osm` XML extract with a streaming
+      parser and split into directed edges (oneway tags respected;
+      motorways and roundabouts are implied oneway)
+    - Each edge gets its length, free-flow travel time (maxspeed or a
+      per-highway default) and the highest NOAH Var of any hazard polygon it
+      crosses (one bulk STRtree query over all edges)
+    - The graph is stored in CSR form (indptr / indices / per-edge arrays)
+      and saved as a compressed `.npz`
+
+Query:
+    - FDI values of the latest FDI table are attached to edges from the
+      nearest FDI point (within FDI_RADIUS_M); refreshed without a rebuild
+    - Edge cost = travel_time · (1 + HAZARD_WEIGHT · Var/3 + FDI_WEIGHT · FDI)
+    - A* with a straight-line / top-speed heuristic (admissible, since the
+      penalties never make an edge cheaper than its travel time)
+
+Input:
+    - ../raw_data/ncr.osm (OSM XML extract)
+    - ../raw_data/ncr_noah.geojson
+    - ../processed_data/ncr_FDI.csv
+
+Output:
+    - road_graph.npz
+    - offline_routes.csv (fastest vs hazard-aware route, same columns as
+      simplified_routes.csv)
+"""
+
+import argparse
+import heapq
+import os
+import time
+import xml.etree.ElementTree as ET
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+from shapely import linestrings
+from hazard_index import GEOJSON_FILE, HazardIndex
+from spatial_interpolation import project_xy
+from vector_tiles import load_latest_fdi
+
+# === CONFIGURATION ===
+OSM_FILE = "../raw_data/ncr.osm"
+GRAPH_FILE = "road_graph.npz"
+FDI_FILE = "../processed_data/ncr_FDI.csv"
+OUTPUT_FILE = "offline_routes.csv"
+
+# Free-flow speeds (km/h) when a way has no usable maxspeed tag
+DEFAULT_SPEEDS = {
+    "motorway": 80, "trunk": 60, "primary": 40, "secondary": 35, "tertiary": 30,
+    "unclassified": 25, "residential": 20, "living_street": 10, "service": 15,
+    "motorway_link": 50, "trunk_link": 40, "primary_link": 30,
+    "secondary_link": 30, "tertiary_link": 25,
+}
+HAZARD_WEIGHT = 1.0   # +100% travel time on Var 3 edges
+FDI_WEIGHT = 1.0      # +100% travel time at FDI 1.0
+FDI_RADIUS_M = 1500   # edges farther than this from any FDI point get FDI 0
+MAX_VAR = 3.0
+HEURISTIC_SLACK = 0.99
+
+EARTH_RADIUS_M = 6371000
+
+
+# === HELPER FUNCTIONS ===
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance (m) between paired coordinate arrays."""
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dphi, dlam = phi2 - phi1, np.radians(np.asarray(lon2) - np.asarray(lon1))
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlam / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+# === BUILD ===
+def parse_osm(osm_file):
+    """Stream an OSM XML file; returns (node_coords {id: (lat, lon)}, ways [(node_ids, tags)])."""
+    node_coords = {}
+    ways = []
+    for _, elem in ET.iterparse(osm_file, events=("end",)):
+        if elem.tag == "node":
+            node_coords[elem.get("id")] = (float(elem.get("lat")), float(elem.get("lon")))
+            elem.clear()
+        elif elem.tag == "way":
+            tags = {t.get("k"): t.get("v") for t in elem.iter("tag")}
+            if tags.get("highway") in DEFAULT_SPEEDS:
+                ways.append(([nd.get("ref") for nd in elem.iter("nd")], tags))
+            elem.clear()
+        elif elem.tag == "relation":
+            elem.clear()
+    return node_coords, ways
+
+
+def way_speed_kmh(tags):
+    """Positive maxspeed tag (km/h or mph) if parseable, else the highway default."""
+    raw = (tags.get("maxspeed") or "").strip().lower()
+    try:
+        speed = float(raw[:-3]) * 1.609 if raw.endswith("mph") else float(raw.split()[0])
+    except (ValueError, IndexError):
+        speed = 0.0
+    if not (speed > 0 and np.isfinite(speed)):  # "0", negatives, NaN and inf
+        return float(DEFAULT_SPEEDS[tags["highway"]])
+    return speed
+
+
+def build_graph(osm_file, hazard_index):
+    """OSM extract → dict of CSR arrays with per-edge length, time and Var."""
+    node_coords, ways = parse_osm(osm_file)
+
+    node_index = {}
+    src, dst, speeds = [], [], []
+    for refs, tags in ways:
+        refs = [r for r in refs if r in node_coords]
+        ids = [node_index.setdefault(r, len(node_index)) for r in refs]
+        # Motorways and roundabouts are oneway unless tagged otherwise
+        implied = tags["highway"] in ("motorway", "motorway_link") or tags.get("junction") == "roundabout"
+        oneway = tags.get("oneway", "yes" if implied else "no")
+        speed = way_speed_kmh(tags)
+        for a, b in zip(ids[:-1], ids[1:]):
+            if oneway == "-1":
+                a, b = b, a
+            src.append(a)
+            dst.append(b)
+            speeds.append(speed)
+            if oneway not in ("yes", "true", "1", "-1"):
+                src.append(b)
+                dst.append(a)
+                speeds.append(speed)
+
+    coords = np.empty((len(node_index), 2), dtype=np.float64)
+    for ref, i in node_index.items():
+        coords[i] = node_coords[ref]
+    lat, lon = coords[:, 0], coords[:, 1]
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+
+    length_m = haversine_m(lat[src], lon[src], lat[dst], lon[dst])
+    time_s = length_m / (np.asarray(speeds) / 3.6)
+
+    # Highest Var of any hazard polygon each edge crosses, in one bulk query
+    lines = linestrings(np.stack([np.column_stack([lon[src], lat[src]]),
+                                  np.column_stack([lon[dst], lat[dst]])], axis=1))
+    var = np.zeros(len(src))
+    edge_idx, poly_idx = hazard_index.tree.query(lines, predicate="intersects")
+    np.maximum.at(var, edge_idx, hazard_index.var_values[poly_idx])
+
+    # CSR: edges sorted by source node
+    order = np.argsort(src, kind="stable")
+    indptr = np.zeros(len(node_index) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=len(node_index)), out=indptr[1:])
+    return {
+        "indptr": indptr,
+        "indices": dst[order].astype(np.int32),
+        "length_m": length_m[order].astype(np.float32),
+        "time_s": time_s[order].astype(np.float32),
+        "var": var[order].astype(np.uint8),
+        "lat": lat,
+        "lon": lon,
+    }
+
+
+# === ROUTER ===
+class RoadGraph:
+    """CSR road graph with per-edge hazard and FDI penalties and an A* router."""
+
+    def __init__(self, indptr, indices, length_m, time_s, var, lat, lon):
+        self.indptr = indptr
+        self.indices = indices
+        self.length_m = length_m
+        self.time_s = time_s
+        self.var = var
+        self.lat = lat
+        self.lon = lon
+        self.fdi = np.zeros(len(indices), dtype=np.float32)
+        self.ref_lat = float(np.mean(lat))
+        self.node_tree = cKDTree(project_xy(lat, lon, self.ref_lat))
+        self.edge_src = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        # Upper bound on speed (m/s) for the admissible A* heuristic
+        self.max_speed = float(np.max(length_m / np.maximum(time_s, 1e-6))) if len(time_s) else 1.0
+        self._costs = {}
+        # Plain lists are much faster than numpy scalars inside the A* loop
+        self._indptr = indptr.tolist()
+        self._indices = indices.tolist()
+        self._xy = self.node_tree.data.tolist()
+
+    @classmethod
+    def load(cls, graph_file=GRAPH_FILE):
+        with np.load(graph_file) as data:
+            return cls(**{k: data[k] for k in data.files})
+
+    def save(self, graph_file=GRAPH_FILE):
+        np.savez_compressed(graph_file, indptr=self.indptr, indices=self.indices,
+                            length_m=self.length_m, time_s=self.time_s, var=self.var,
+                            lat=self.lat, lon=self.lon)
+
+    @property
+    def n_nodes(self):
+        return len(self.indptr) - 1
+
+    def set_fdi(self, lats, lons, fdi, radius_m=FDI_RADIUS_M):
+        """Attach the nearest FDI point's value (within radius_m) to every edge midpoint."""
+        mid_lat = (self.lat[self.edge_src] + self.lat[self.indices]) / 2
+        mid_lon = (self.lon[self.edge_src] + self.lon[self.indices]) / 2
+        tree = cKDTree(project_xy(lats, lons, self.ref_lat))
+        dist, idx = tree.query(project_xy(mid_lat, mid_lon, self.ref_lat),
+                               distance_upper_bound=radius_m)
+        found = np.isfinite(dist)
+        self.fdi = np.zeros(len(self.indices), dtype=np.float32)
+        self.fdi[found] = np.asarray(fdi, dtype=np.float32)[idx[found]]
+        self._costs.clear()
+
+    def edge_costs(self, hazard_weight=HAZARD_WEIGHT, fdi_weight=FDI_WEIGHT):
+        """Per-edge cost (s), cached per weight setting as a Python list for the A* loop."""
+        key = (hazard_weight, fdi_weight)
+        if key not in self._costs:
+            cost = self.time_s * (1 + hazard_weight * self.var / MAX_VAR + fdi_weight * self.fdi)
+            self._costs[key] = cost.astype(np.float64).tolist()
+        return self._costs[key]
+
+    def nearest_node(self, lat, lon):
+        _, idx = self.node_tree.query(project_xy([lat], [lon], self.ref_lat)[0])
+        return int(idx)
+
+    def shortest_path(self, origin, destination, hazard_weight=HAZARD_WEIGHT, fdi_weight=FDI_WEIGHT):
+        """A* between two (lat, lon) pairs; returns (node path, edge path) or (None, None)."""
+        s = self.nearest_node(*origin)
+        t = self.nearest_node(*destination)
+        cost = self.edge_costs(hazard_weight, fdi_weight)
+        indptr, indices, xy = self._indptr, self._indices, self._xy
+        tx, ty = xy[t]
+        # Slightly shrunk so projection error never makes the heuristic overestimate
+        inv_speed = HEURISTIC_SLACK / self.max_speed
+
+        def h(v):
+            x, y = xy[v]
+            return ((x - tx) ** 2 + (y - ty) ** 2) ** 0.5 * inv_speed
+
+        g = {s: 0.0}
+        parent = {s: (-1, -1)}
+        closed = set()
+        heap = [(h(s), s)]
+        while heap:
+            _, u = heapq.heappop(heap)
+            if u in closed:
+                continue
+            if u == t:
+                break
+            closed.add(u)
+            gu = g[u]
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                nv = gu + cost[e]
+                if nv < g.get(v, float("inf")):
+                    g[v] = nv
+                    parent[v] = (u, e)
+                    heapq.heappush(heap, (nv + h(v), v))
+        if t not in parent:
+            return None, None
+
+        nodes, edges = [t], []
+        while parent[nodes[-1]][0] != -1:
+            u, e = parent[nodes[-1]]
+            nodes.append(u)
+            edges.append(e)
+        return nodes[::-1], edges[::-1]
+
+    def route_summary(self, nodes, edges):
+        """Distance, duration and hazard exposure (Σ km · Var) of a path."""
+        edges = np.asarray(edges, dtype=np.int64)
+        km = self.length_m[edges].astype(np.float64) / 1000
+        return {
+            "distance_km": round(float(km.sum()), 2),
+            "duration_min": round(float(self.time_s[edges].sum()) / 60, 1),
+            "hazard_exposure": float(np.sum(km * self.var[edges])),
+            "max_var": int(self.var[edges].max()) if len(edges) else 0,
+            "lat": self.lat[nodes],
+            "lon": self.lon[nodes],
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline hazard-aware routing on a local OSM extract")
+    parser.add_argument("--osm", default=OSM_FILE)
+    parser.add_argument("--graph", default=GRAPH_FILE)
+    parser.add_argument("--geojson", default=GEOJSON_FILE)
+    parser.add_argument("--fdi", default=FDI_FILE)
+    parser.add_argument("--origin", default="14.65728,121.064451", help="lat,lon")
+    parser.add_argument("--destination", default="14.640998,121.077131", help="lat,lon")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the graph from the OSM extract")
+    args = parser.parse_args()
+
+    # === 1. Build or load the graph ===
+    if args.rebuild or not os.path.exists(args.graph):
+        t0 = time.perf_counter()
+        graph = RoadGraph(**build_graph(args.osm, HazardIndex.from_geojson(args.geojson)))
+        graph.save(args.graph)
+        print(f"✅ Built graph ({graph.n_nodes} nodes, {len(graph.indices)} edges) "
+              f"in {time.perf_counter() - t0:.1f}s → {args.graph}")
+    else:
+        graph = RoadGraph.load(args.graph)
+        print(f"✅ Loaded graph ({graph.n_nodes} nodes, {len(graph.indices)} edges)")
+
+    # === 2. Attach latest FDI per point ===
+    if os.path.exists(args.fdi):
+        fdi = load_latest_fdi(args.fdi)
+        graph.set_fdi(fdi["latitude"], fdi["longitude"], fdi["FDI"].fillna(0))
+        print(f"✅ Attached FDI from {len(fdi)} points")
+    else:
+        print(f"⚠️ {args.fdi} not found, routing on hazard and time only")
+
+    # === 3. Fastest vs hazard-aware ===
+    origin = tuple(float(v) for v in args.origin.split(","))
+    destination = tuple(float(v) for v in args.destination.split(","))
+    rows = []
+    for name, hw, fw in [("offline fastest", 0.0, 0.0), ("offline hazard-aware", HAZARD_WEIGHT, FDI_WEIGHT)]:
+        t0 = time.perf_counter()
+        nodes, edges = graph.shortest_path(origin, destination, hw, fw)
+        ms = (time.perf_counter() - t0) * 1000
+        if nodes is None:
+            print(f"❌ {name}: no path between origin and destination")
+            continue
+        s = graph.route_summary(nodes, edges)
+        print(f"✅ {name}: {s['distance_km']} km, {s['duration_min']} min, "
+              f"exposure {s['hazard_exposure']:.2f}, max Var {s['max_var']} ({ms:.1f} ms)")
+        for order, (lat, lon) in enumerate(zip(s["lat"], s["lon"])):
+            rows.append([name, s["distance_km"], s["duration_min"], lat, lon, order])
+
+    pd.DataFrame(rows, columns=["route_name", "distance_km", "duration_min", "lat", "lon", "order"]) \
+        .to_csv(OUTPUT_FILE, index=False)
+    print(f"\n✅ Routes saved to {OUTPUT_FILE}")
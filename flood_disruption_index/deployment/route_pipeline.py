@@ -0,0 +1,92 @@
+"""
+Route Risk Pipeline
+-------------------
+Backend handler for one rider route request, combining
+route_processing.py and check_points.py:
+
+    1. Mapbox Directions alternatives (fetch_routes)
+    2. Route naming and point simplification (route_point_rows)
+    3. Var assignment for every route point (HazardIndex)
+    4. Ranking of the alternatives (route_ranking.RouteRanker): Pareto
+       set over distance, duration, hazard exposure and CRI, plus the
+       weighted best route
+    5. Optional OWM One Call lookup at the route midpoint for the
+       next-hour precipitation
+
+Base URLs are parameters so the pipeline can be pointed at local stubs
+(see load_test.py).
+
+Var lookups go through a quantized-coordinate LRU memo and forecasts are
+memoized per ~1 km cell and clock hour (coord_memo.py); pass shared memos
+to reuse them across pipelines. `memo_stats()` reports their hit rates.
+The ranker (hazard raster + CRI interpolator) can be shared the same way.
+"""
+
+import time
+import pandas as pd
+import requests
+from coord_memo import FORECAST_CELL_DECIMALS, LRUMemo, QuantizedLookup, quantize
+from route_processing import MAPBOX_DIRECTIONS_URL, fetch_routes, route_point_rows
+from route_ranking import RouteRanker, load_cri_fn
+
+# === CONFIGURATION ===
+OWM_ONECALL_URL = "https://api.openweathermap.org/data/3.0/onecall"
+ROUTE_COLUMNS = ["route_name", "distance_km", "duration_min", "lat", "lon", "order"]
+RANKING_COLUMNS = ["route_name", "hazard_exposure", "weighted_score", "pareto", "best"]
+
+
+class RoutePipeline:
+    """Route request → simplified route points with Var (and forecast precip)."""
+
+    def __init__(self, hazard_index, mapbox_url=MAPBOX_DIRECTIONS_URL,
+                 owm_url=OWM_ONECALL_URL, owm_api_key=None, session=None,
+                 var_lookup=None, forecast_memo=None, ranker=None):
+        self.hazard_index = hazard_index
+        if var_lookup is None:
+            var_lookup = QuantizedLookup(lambda lats, lons: hazard_index.highest_var(lons, lats))
+        self.var_lookup = var_lookup
+        self.forecast_memo = LRUMemo() if forecast_memo is None else forecast_memo
+        self.ranker = RouteRanker(hazard_index, cri_fn=load_cri_fn()) if ranker is None else ranker
+        self.mapbox_url = mapbox_url
+        self.owm_url = owm_url
+        self.owm_api_key = owm_api_key
+        self.session = session or requests.Session()
+
+    def forecast_precip(self, lat, lon):
+        """Next-hour precipitation (mm) at a coordinate, one OWM call per cell and hour."""
+        key = (int(quantize(lat, lon, FORECAST_CELL_DECIMALS)), int(time.time() // 3600))
+        cached = self.forecast_memo.get(key)
+        if cached is not None:
+            return cached
+        precip = self._fetch_forecast_precip(lat, lon)
+        self.forecast_memo.put(key, precip)
+        return precip
+
+    def _fetch_forecast_precip(self, lat, lon):
+        params = {"lat": lat, "lon": lon, "appid": self.owm_api_key,
+                  "units": "metric", "exclude": "minutely,daily,alerts"}
+        resp = self.session.get(self.owm_url, params=params)
+        resp.raise_for_status()
+        hourly = resp.json().get("hourly", [])
+        if not hourly:
+            return 0.0
+        hour = hourly[0]
+        return hour.get("rain", hour.get("snow", {})).get("1h", 0.0)
+
+    def handle(self, origin, destination, with_forecast=False):
+        """Process one route request; returns route points with Var and their route's ranking."""
+        routes = fetch_routes(origin, destination, self.mapbox_url, self.session)
+        df = pd.DataFrame(list(route_point_rows(routes)), columns=ROUTE_COLUMNS)
+        df["Var"] = self.var_lookup(df["lat"].to_numpy(), df["lon"].to_numpy())
+        if len(df):
+            ranking = self.ranker.rank(df)
+            df = df.merge(ranking[RANKING_COLUMNS], on="route_name", how="left")
+
+        if with_forecast:
+            mid = df.iloc[len(df) // 2]
+            df["precip_next_1h"] = self.forecast_precip(mid["lat"], mid["lon"])
+        return df
+
+    def memo_stats(self):
+        """Hit / miss counts of the Var and forecast memos."""
+        return {"hazard_var": self.var_lookup.stats(), "forecast": self.forecast_memo.stats()}
@@ -9,6 +9,7 @@ MAPBOX_TOKEN = os.getenv("MAPBOX_API")
 ORIGIN = (14.65728, 121.064451)   # UP
 DESTINATION = (14.640998, 121.077131)  # ATENEO
 OUTPUT_FILE = "simplified_routes.csv"
+MAPBOX_DIRECTIONS_URL = "https://api.mapbox.com/directions/v5/mapbox/driving"
 
 def haversine(lat1, lon1, lat2, lon2):
     """Calculate distance in meters between two lat/lon points."""
@@ -68,37 +69,44 @@ def get_route_names(routes):
 
     return route_names
 
-# === 1. Request Mapbox routes ===
-url = f"https://api.mapbox.com/directions/v5/mapbox/driving/{ORIGIN[1]},{ORIGIN[0]};{DESTINATION[1]},{DESTINATION[0]}"
-params = {
-    "alternatives": "true",
-    "overview": "full",
-    "geometries": "polyline6",
-    "steps": "true",
-    "access_token": MAPBOX_TOKEN,
-}
-resp = requests.get(url, params=params)
-data = resp.json()
-
-routes = data.get("routes", [])
-if not routes:
-    raise ValueError("❌ No routes found in Mapbox response")
-
-# === 2. Determine route names ===
-route_names = get_route_names(routes)
-
-# === 3. Write to CSV ===
-with open(OUTPUT_FILE, "w", newline="") as f:
-    writer = csv.writer(f)
-    writer.writerow(["route_name", "distance_km", "duration_min", "lat", "lon", "order"])
-
+def fetch_routes(origin, destination, base_url=MAPBOX_DIRECTIONS_URL, session=requests):
+    """Request driving alternatives between (lat, lon) pairs from Mapbox Directions."""
+    url = f"{base_url}/{origin[1]},{origin[0]};{destination[1]},{destination[0]}"
+    params = {
+        "alternatives": "true",
+        "overview": "full",
+        "geometries": "polyline6",
+        "steps": "true",
+        "access_token": MAPBOX_TOKEN,
+    }
+    resp = session.get(url, params=params)
+    data = resp.json()
+
+    routes = data.get("routes", [])
+    if not routes:
+        raise ValueError("❌ No routes found in Mapbox response")
+    return routes
+
+def route_point_rows(routes, target_count=50):
+    """Yield CSV rows (route_name, distance_km, duration_min, lat, lon, order) for each route."""
+    route_names = get_route_names(routes)
     for route, route_name in zip(routes, route_names):
         distance_km = route["distance"] / 1000
         duration_min = route["duration"] / 60
         coords = polyline.decode(route["geometry"], precision=6)
-        simplified = simplify_points(coords, target_count=50)
+        simplified = simplify_points(coords, target_count=target_count)
 
         for order, (lat, lon) in enumerate(simplified, start=1):
-            writer.writerow([f"via {route_name}", round(distance_km, 2), round(duration_min, 1), lat, lon, order])
+            yield [f"via {route_name}", round(distance_km, 2), round(duration_min, 1), lat, lon, order]
+
+if __name__ == "__main__":
+    # === 1. Request Mapbox routes ===
+    routes = fetch_routes(ORIGIN, DESTINATION)
+
+    # === 2. Write to CSV ===
+    with open(OUTPUT_FILE, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["route_name", "distance_km", "duration_min", "lat", "lon", "order"])
+        writer.writerows(route_point_rows(routes))
 
-print(f"✅ Saved simplified routes to {OUTPUT_FILE}")
+    print(f"✅ Saved simplified routes to {OUTPUT_FILE}")
@@ -0,0 +1,238 @@
+"""
+Route Alternative Ranking (Pareto + Bounds)
+-------------------------------------------
+Ranks the Mapbox alternatives of one request on four objectives, all
+minimized:
+
+    - distance_km
+    - duration_min
+    - hazard exposure : Σ segment_km · mean Var of its endpoints
+    - CRI             : mean CRI along the route, IDW-interpolated from the
+                        latest per-point scores of cri_scoring.py (the
+                        objective is dropped when those scores are missing)
+
+Returns the Pareto-optimal set plus a weighted best choice. When the
+routes already carry a Var column (route_pipeline.py), exact evaluation
+reuses it instead of querying the STRtree again.
+
+Exact hazard evaluation (STRtree point test) is skipped when cheap bounds
+settle it:
+    - bounding box : a route whose bbox touches no hazard polygon has
+                     exposure exactly 0
+    - raster       : a precomputed grid stores, per cell, the highest Var
+                     touching it (upper bound) and the highest Var fully
+                     covering it (lower bound). An alternative whose lower
+                     bound is already dominated by an evaluated route is
+                     pruned without exact evaluation.
+
+Input:
+    - simplified_routes.csv (one request's alternatives)
+    - ../raw_data/ncr_noah.geojson
+    - ../../climate_risk_index/processed_data/cri_latest.json
+
+Output:
+    - printed ranking
+"""
+
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from shapely import box
+from coord_memo import QuantizedLookup
+from hazard_index import GEOJSON_FILE, HazardIndex
+from spatial_interpolation import SpatialInterpolator
+
+# === CONFIGURATION ===
+ROUTES_FILE = "simplified_routes.csv"
+CRI_LATEST_FILE = "../../climate_risk_index/processed_data/cri_latest.json"
+RASTER_RES_DEG = 0.001  # ~110 m cells
+OBJECTIVES = ["distance_km", "duration_min", "hazard_exposure", "cri"]
+WEIGHTS = {"distance_km": 0.2, "duration_min": 0.3, "hazard_exposure": 0.35, "cri": 0.15}
+
+EARTH_RADIUS_KM = 6371.0
+
+
+# === HAZARD RASTER ===
+class HazardRaster:
+    """Per-cell upper / lower bounds on the Var of any point inside the cell."""
+
+    def __init__(self, hazard_index, res_deg=RASTER_RES_DEG):
+        geoms = hazard_index.geoms
+        minx = min(g.bounds[0] for g in geoms)
+        miny = min(g.bounds[1] for g in geoms)
+        maxx = max(g.bounds[2] for g in geoms)
+        maxy = max(g.bounds[3] for g in geoms)
+        self.minx, self.miny, self.res = minx, miny, res_deg
+        self.cols = int(np.ceil((maxx - minx) / res_deg)) + 1
+        self.rows = int(np.ceil((maxy - miny) / res_deg)) + 1
+
+        cx, cy = np.meshgrid(np.arange(self.cols), np.arange(self.rows))
+        x0 = minx + cx.ravel() * res_deg
+        y0 = miny + cy.ravel() * res_deg
+        cells = box(x0, y0, x0 + res_deg, y0 + res_deg)
+
+        upper = np.zeros(len(cells))
+        c_idx, g_idx = hazard_index.tree.query(cells, predicate="intersects")
+        np.maximum.at(upper, c_idx, hazard_index.var_values[g_idx])
+        lower = np.zeros(len(cells))
+        c_idx, g_idx = hazard_index.tree.query(cells, predicate="within")
+        np.maximum.at(lower, c_idx, hazard_index.var_values[g_idx])
+
+        self.upper = upper.reshape(self.rows, self.cols)
+        self.lower = lower.reshape(self.rows, self.cols)
+
+    def bounds(self, lons, lats):
+        """(lower, upper) Var bounds per point; points off the raster are 0."""
+        c = np.floor((np.asarray(lons) - self.minx) / self.res).astype(np.int64)
+        r = np.floor((np.asarray(lats) - self.miny) / self.res).astype(np.int64)
+        inside = (c >= 0) & (c < self.cols) & (r >= 0) & (r < self.rows)
+        lo = np.zeros(len(c))
+        hi = np.zeros(len(c))
+        lo[inside] = self.lower[r[inside], c[inside]]
+        hi[inside] = self.upper[r[inside], c[inside]]
+        return lo, hi
+
+
+# === HELPER FUNCTIONS ===
+def segment_km(lats, lons):
+    """Haversine length (km) of each consecutive segment."""
+    phi = np.radians(lats)
+    lam = np.radians(lons)
+    dphi, dlam = np.diff(phi), np.diff(lam)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi[:-1]) * np.cos(phi[1:]) * np.sin(dlam / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def exposure(seg_km, point_var):
+    """Σ segment length · mean Var of its two endpoints."""
+    if len(point_var) < 2:
+        return 0.0
+    return float(np.sum(seg_km * (point_var[:-1] + point_var[1:]) / 2))
+
+
+def dominated_by_any(F, b):
+    """True if any row of F Pareto-dominates objective vector b (minimization)."""
+    if not len(F):
+        return False
+    return bool(np.any(np.all(F <= b, axis=1) & np.any(F < b, axis=1)))
+
+
+def pareto_mask(F):
+    """Non-dominated rows of an (alternatives x objectives) matrix."""
+    F = np.asarray(F, dtype=np.float64)
+    le = np.all(F[:, None, :] <= F[None, :, :], axis=2)
+    lt = np.any(F[:, None, :] < F[None, :, :], axis=2)
+    dominated = (le & lt).any(axis=0)
+    return ~dominated
+
+
+def load_cri_fn(latest_file=CRI_LATEST_FILE):
+    """IDW CRI lookup (lats, lons) over the latest per-point scores; None if missing."""
+    if not os.path.exists(latest_file):
+        print(f"⚠️ {latest_file} not found (run cri_scoring.py); ranking without the CRI objective")
+        return None
+    with open(latest_file, "r") as f:
+        latest = list(json.load(f).values())
+    interp = SpatialInterpolator(
+        [p["latitude"] for p in latest], [p["longitude"] for p in latest], [p["CRI"] for p in latest]
+    )
+    return QuantizedLookup(lambda lats, lons: interp.interpolate(lats, lons, method="idw"))
+
+
+# === RANKER ===
+class RouteRanker:
+    """Scores alternatives, prunes by bounds, returns Pareto set and weighted best."""
+
+    def __init__(self, hazard_index, raster=None, cri_fn=None, weights=WEIGHTS):
+        self.hazard_index = hazard_index
+        self.raster = raster or HazardRaster(hazard_index)
+        self.cri_fn = cri_fn
+        self.objectives = OBJECTIVES if cri_fn else [k for k in OBJECTIVES if k != "cri"]
+        self.weights = weights
+
+    def rank(self, routes_df):
+        """
+        routes_df has route_name, distance_km, duration_min, lat, lon, order
+        and optionally Var. Returns a DataFrame with one row per alternative.
+        """
+        df = routes_df.sort_values(["route_name", "order"], kind="stable")
+        names, starts = np.unique(df["route_name"].to_numpy(), return_index=True)
+        bounds = np.append(starts, len(df))
+        lat_all, lon_all = df["lat"].to_numpy(), df["lon"].to_numpy()
+        dist_all, dur_all = df["distance_km"].to_numpy(), df["duration_min"].to_numpy()
+        var_all = df["Var"].to_numpy(dtype=np.float64) if "Var" in df.columns else None
+
+        rows = []
+        for name, a, b in zip(names, bounds[:-1], bounds[1:]):
+            lats, lons = lat_all[a:b], lon_all[a:b]
+            seg = segment_km(lats, lons)
+            lo_var, hi_var = self.raster.bounds(lons, lats)
+            cri = float(np.mean(self.cri_fn(lats, lons))) if self.cri_fn else 0.0
+            rows.append({
+                "route_name": name,
+                "distance_km": float(dist_all[a]),
+                "duration_min": float(dur_all[a]),
+                "cri": cri,
+                "hazard_lower": exposure(seg, lo_var),
+                "hazard_upper": exposure(seg, hi_var),
+                "bbox": (lons.min(), lats.min(), lons.max(), lats.max()),
+                "lats": lats, "lons": lons, "seg": seg,
+                "var": None if var_all is None else var_all[a:b],
+            })
+
+        # Evaluate the most promising routes first so their exact scores can prune the rest
+        rows.sort(key=lambda r: (r["hazard_lower"], r["duration_min"], r["distance_km"]))
+        objectives = self.objectives
+        evaluated = np.empty((0, len(objectives)))
+        for r in rows:
+            r["method"] = "exact"
+            if r["hazard_upper"] == 0 or not len(self.hazard_index.tree.query(box(*r["bbox"]))):
+                r["hazard_exposure"], r["method"] = 0.0, "bbox"
+            elif r["hazard_lower"] == r["hazard_upper"]:
+                r["hazard_exposure"], r["method"] = r["hazard_lower"], "raster"
+            else:
+                optimistic = np.array([r["hazard_lower"] if k == "hazard_exposure" else r[k] for k in objectives])
+                if dominated_by_any(evaluated, optimistic):
+                    r["hazard_exposure"], r["method"] = np.nan, "pruned"
+                else:
+                    var = r["var"] if r["var"] is not None else self.hazard_index.highest_var(r["lons"], r["lats"])
+                    r["hazard_exposure"] = exposure(r["seg"], var)
+            if r["method"] != "pruned":
+                evaluated = np.vstack([evaluated, [r[k] for k in objectives]])
+
+        result = pd.DataFrame([
+            {k: r[k] for k in ["route_name"] + objectives + ["hazard_lower", "hazard_upper", "method"]}
+            for r in rows
+        ])
+        scored = result["method"] != "pruned"
+        result["pareto"] = False
+        result.loc[scored, "pareto"] = pareto_mask(result.loc[scored, objectives].to_numpy())
+
+        # Weighted best among the Pareto set (objectives min-max scaled over that set)
+        front = result[result["pareto"]]
+        F = front[objectives].to_numpy(dtype=np.float64)
+        span = np.where(F.max(axis=0) > F.min(axis=0), F.max(axis=0) - F.min(axis=0), 1.0)
+        w = np.array([self.weights[k] for k in objectives])
+        result["weighted_score"] = np.nan
+        result.loc[front.index, "weighted_score"] = ((F - F.min(axis=0)) / span) @ w
+        result["best"] = False
+        if len(front):
+            result.loc[result["weighted_score"].idxmin(), "best"] = True
+        return result
+
+
+if __name__ == "__main__":
+    # === 1. Build index and raster once ===
+    hazard_index = HazardIndex.from_geojson(GEOJSON_FILE)
+    t0 = time.perf_counter()
+    ranker = RouteRanker(hazard_index, cri_fn=load_cri_fn())
+    print(f"✅ Hazard raster {ranker.raster.upper.shape} built in {time.perf_counter() - t0:.2f}s")
+
+    # === 2. Rank this request's alternatives ===
+    routes = pd.read_csv(ROUTES_FILE)
+    t0 = time.perf_counter()
+    ranking = ranker.rank(routes)
+    print(f"✅ Ranked {len(ranking)} alternatives in {(time.perf_counter() - t0) * 1000:.2f} ms")
+    print(ranking.to_string(index=False))
@@ -0,0 +1,214 @@
+"""
+Spatial Interpolation Engine
+----------------------------
+Estimates CRI indicators and precipitation at arbitrary coordinates
+(e.g. route points) from the fixed sampling sites.
+
+Methods:
+    - IDW      : inverse-distance weighting over the k nearest sites
+    - Gaussian : Gaussian kernel over the k nearest sites
+
+A KD-tree is built once over the sites (in a local metric projection) and
+queries are evaluated in vectorized batches, so millions of route points
+can be processed without extra API calls.
+
+Dense grid surfaces can also be precomputed and saved as `.npy` files,
+which are later opened with `np.load(..., mmap_mode="r")` and sampled
+with bilinear interpolation.
+
+Inputs:
+    - ../../climate_risk_index/processed_data/ncr_sample_points.csv
+    - ../../climate_risk_index/raw_data/ncr_*_A.csv / ncr_*_B.csv
+    - ../raw_data/ncr_current_forecast_precip.csv
+    - simplified_routes_with_var.csv
+
+Output:
+    - simplified_routes_interpolated.csv
+
+Route points are evaluated through a quantized-coordinate memo
+(coord_memo.py), so vertices shared between routes are computed once.
+"""
+
+import json
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+from coord_memo import QuantizedLookup
+
+# === CONFIGURATION ===
+SAMPLE_POINTS_FILE = "../../climate_risk_index/processed_data/ncr_sample_points.csv"
+CLIMATE_FILES = [
+    "../../climate_risk_index/raw_data/ncr_1to6_25_A.csv",
+    "../../climate_risk_index/raw_data/ncr_7to12_24_A.csv",
+]
+AIR_FILES = [
+    "../../climate_risk_index/raw_data/ncr_1to6_25_B.csv",
+    "../../climate_risk_index/raw_data/ncr_7to12_24_B.csv",
+]
+FORECAST_FILE = "../raw_data/ncr_current_forecast_precip.csv"
+ROUTES_FILE = "simplified_routes_with_var.csv"
+OUTPUT_FILE = "simplified_routes_interpolated.csv"
+
+CRI_INDICATORS = ["temp_mean", "humidity_mean", "precipitation_total", "wind_speed_max", "aqi_mean"]
+
+EARTH_RADIUS_M = 6371000
+BATCH_SIZE = 250_000  # query points evaluated per vectorized batch
+
+
+# === HELPER FUNCTIONS ===
+def project_xy(lats, lons, ref_lat):
+    """Project lat/lon (degrees) to local equirectangular x/y in meters."""
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    k = np.pi / 180 * EARTH_RADIUS_M
+    x = lons * k * np.cos(np.radians(ref_lat))
+    y = lats * k
+    return np.column_stack([x, y])
+
+
+class SpatialInterpolator:
+    """KD-tree backed IDW / Gaussian interpolator over fixed sample sites."""
+
+    def __init__(self, lats, lons, values, k=8, power=2.0, bandwidth_m=3000.0):
+        values = np.asarray(values, dtype=np.float64)
+        self.squeeze = values.ndim == 1
+        self.values = values.reshape(len(values), -1)
+        self.ref_lat = float(np.mean(lats))
+        self.tree = cKDTree(project_xy(lats, lons, self.ref_lat))
+        self.k = min(k, len(self.values))
+        self.power = power
+        self.bandwidth_m = bandwidth_m
+
+    def _weights(self, dist, method):
+        if method == "idw":
+            with np.errstate(divide="ignore"):
+                w = 1.0 / dist ** self.power
+            # Exact hits take the site value directly
+            exact = ~np.isfinite(w)
+            if exact.any():
+                rows = exact.any(axis=1)
+                w[rows] = exact[rows].astype(np.float64)
+            return w
+        if method == "gaussian":
+            return np.exp(-0.5 * (dist / self.bandwidth_m) ** 2)
+        raise ValueError(f"Unknown interpolation method: {method}")
+
+    def _evaluate(self, xy, method):
+        dist, idx = self.tree.query(xy, k=self.k)
+        if self.k == 1:
+            dist, idx = dist[:, None], idx[:, None]
+        w = self._weights(dist, method)
+        wsum = w.sum(axis=1, keepdims=True)
+        # Gaussian weights can underflow far from every site; fall back to nearest
+        far = wsum[:, 0] == 0
+        if far.any():
+            w[far] = 0.0
+            w[far, 0] = 1.0
+            wsum[far] = 1.0
+        vals = np.einsum("qk,qkv->qv", w, self.values[idx])
+        return vals / wsum
+
+    def interpolate(self, lats, lons, method="idw", batch_size=BATCH_SIZE):
+        """Estimate values at query points. Returns (n,) or (n, n_vars)."""
+        xy = project_xy(lats, lons, self.ref_lat)
+        out = np.empty((len(xy), self.values.shape[1]), dtype=np.float64)
+        for start in range(0, len(xy), batch_size):
+            stop = start + batch_size
+            out[start:stop] = self._evaluate(xy[start:stop], method)
+        return out[:, 0] if self.squeeze else out
+
+    def build_grid(self, bounds, resolution_deg, method="idw"):
+        """Evaluate a dense (rows x cols x n_vars) surface over lon/lat bounds."""
+        minx, miny, maxx, maxy = bounds
+        xs = np.arange(minx, maxx + resolution_deg / 2, resolution_deg)
+        ys = np.arange(miny, maxy + resolution_deg / 2, resolution_deg)
+        grid_lon, grid_lat = np.meshgrid(xs, ys)
+        vals = self.interpolate(grid_lat.ravel(), grid_lon.ravel(), method=method)
+        grid = vals.reshape(len(ys), len(xs), -1).astype(np.float32)
+        meta = {
+            "minx": float(xs[0]), "miny": float(ys[0]),
+            "resolution_deg": float(resolution_deg),
+            "shape": list(grid.shape), "method": method,
+        }
+        return grid, meta
+
+
+def save_grid_surface(path, grid, meta, columns):
+    """Save a grid surface as `<path>.npy` plus `<path>.json` metadata."""
+    np.save(f"{path}.npy", grid)
+    with open(f"{path}.json", "w") as f:
+        json.dump({**meta, "columns": list(columns)}, f, indent=2)
+
+
+def load_grid_surface(path):
+    """Memory-map a grid surface saved with `save_grid_surface`."""
+    grid = np.load(f"{path}.npy", mmap_mode="r")
+    with open(f"{path}.json", "r") as f:
+        meta = json.load(f)
+    return grid, meta
+
+
+def sample_grid(grid, meta, lats, lons):
+    """Bilinearly sample a (memory-mapped) grid surface at lat/lon points."""
+    res = meta["resolution_deg"]
+    rows, cols = grid.shape[:2]
+    fx = np.clip((np.asarray(lons) - meta["minx"]) / res, 0, cols - 1)
+    fy = np.clip((np.asarray(lats) - meta["miny"]) / res, 0, rows - 1)
+    x0 = np.minimum(fx.astype(np.int64), cols - 2) if cols > 1 else np.zeros(len(fx), dtype=np.int64)
+    y0 = np.minimum(fy.astype(np.int64), rows - 2) if rows > 1 else np.zeros(len(fy), dtype=np.int64)
+    x1 = np.minimum(x0 + 1, cols - 1)
+    y1 = np.minimum(y0 + 1, rows - 1)
+    tx = (fx - x0)[:, None]
+    ty = (fy - y0)[:, None]
+    top = grid[y0, x0] * (1 - tx) + grid[y0, x1] * tx
+    bottom = grid[y1, x0] * (1 - tx) + grid[y1, x1] * tx
+    return np.asarray(top * (1 - ty) + bottom * ty)
+
+
+def load_cri_site_values():
+    """Per-site mean of each CRI indicator, aligned to the sample points."""
+    sites = pd.read_csv(SAMPLE_POINTS_FILE)
+    climate = pd.concat([pd.read_csv(f) for f in CLIMATE_FILES], ignore_index=True)
+    air = pd.concat([pd.read_csv(f) for f in AIR_FILES], ignore_index=True)
+    means = (
+        climate.groupby("point_id")[CRI_INDICATORS[:-1]].mean()
+        .join(air.groupby("point_id")[["aqi_mean"]].mean())
+    )
+    sites = sites.join(means, on="Point_ID").dropna(subset=CRI_INDICATORS)
+    return sites
+
+
+def load_precip_site_values(source="current"):
+    """Latest precipitation per forecast point for the given source."""
+    df = pd.read_csv(FORECAST_FILE)
+    df = df[df["source"] == source]
+    return df.groupby("point_id", sort=False).last().reset_index()
+
+
+if __name__ == "__main__":
+    # === 1. Build interpolators ===
+    cri_sites = load_cri_site_values()
+    cri_interp = SpatialInterpolator(
+        cri_sites["Latitude"], cri_sites["Longitude"], cri_sites[CRI_INDICATORS]
+    )
+    print(f"✅ CRI interpolator built over {len(cri_sites)} sample sites")
+
+    precip_sites = load_precip_site_values()
+    precip_interp = SpatialInterpolator(
+        precip_sites["latitude"], precip_sites["longitude"], precip_sites["precipitation_total"]
+    )
+    print(f"✅ Precipitation interpolator built over {len(precip_sites)} forecast points")
+
+    # === 2. Attach values to route points ===
+    routes = pd.read_csv(ROUTES_FILE)
+    cri_lookup = QuantizedLookup(lambda lats, lons: cri_interp.interpolate(lats, lons, method="idw"))
+    precip_lookup = QuantizedLookup(lambda lats, lons: precip_interp.interpolate(lats, lons, method="gaussian"))
+    cri_vals = cri_lookup(routes["lat"], routes["lon"])
+    for j, col in enumerate(CRI_INDICATORS):
+        routes[col] = cri_vals[:, j].round(4)
+    routes["precip_current"] = precip_lookup(routes["lat"], routes["lon"]).round(4)
+    print(f"🧠 Memo cells evaluated: {cri_lookup.stats()['size']} for {len(routes)} route points")
+
+    # === 3. Save output ===
+    routes.to_csv(OUTPUT_FILE, index=False)
+    print(f"✅ Saved {len(routes)} interpolated route points to {OUTPUT_FILE}")
@@ -0,0 +1,463 @@
+"""
+Vector Tiles for the Map Client
+-------------------------------
+Pre-generates Mapbox Vector Tiles (MVT 2.1) for two layers and serves them
+with ETags:
+
+    - hazard : NOAH hazard polygons (property Var), simplified per zoom
+    - fdi    : latest FDI per sample point (point_id, FDI, FDI_class, Var,
+               timestamp)
+
+Tiles are written as an on-disk pyramid `TILE_DIR/<layer>/<z>/<x>/<y>.mvt`
+with a `manifest.json` per layer. The MVT protobuf is encoded directly
+(no mapbox_vector_tile / protobuf dependency).
+
+Geometry per zoom: projected to Web Mercator tile units (extent 4096),
+simplified once per zoom, clipped per tile with a small buffer, snapped to
+the integer grid and oriented as the spec requires.
+
+Incremental FDI update: the manifest stores a hash of every point's
+properties and position; only tiles holding a new, changed or removed
+point are rebuilt.
+
+Usage:
+    python vector_tiles.py build [--layers hazard fdi]
+    python vector_tiles.py update            # incremental FDI tiles
+    python vector_tiles.py serve [--port 8080]
+
+Input:
+    - ../raw_data/ncr_noah.geojson
+    - ../processed_data/ncr_FDI.csv
+
+Output:
+    - tiles/hazard/, tiles/fdi/
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import shutil
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+import shapely
+from coord_memo import LRUMemo
+from hazard_index import GEOJSON_FILE, load_hazard_polygons
+
+# === CONFIGURATION ===
+FDI_FILE = "../processed_data/ncr_FDI.csv"
+TILE_DIR = "tiles"
+LAYERS = ("hazard", "fdi")
+EXTENT = 4096
+BUFFER = 64                # tile units kept outside each edge when clipping
+SIMPLIFY_TOLERANCE = 2.0   # tile units, applied at every zoom
+HAZARD_ZOOMS = range(10, 16)
+FDI_ZOOMS = range(10, 17)
+FDI_PROPERTIES = ["point_id", "FDI", "FDI_class", "Var", "timestamp"]
+TILE_CACHE_SIZE = 2048
+MVT_MIME_TYPE = "application/vnd.mapbox-vector-tile"
+
+GEOM_POINT, GEOM_POLYGON = 1, 3
+CMD_MOVE_TO, CMD_LINE_TO, CMD_CLOSE_PATH = 1, 2, 7
+
+
+# === PROTOBUF / MVT ENCODING ===
+def _varint(n):
+    out = bytearray()
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _zigzag(n):
+    return (n << 1) ^ (n >> 63)
+
+
+def _key(field, wire_type):
+    return _varint((field << 3) | wire_type)
+
+
+def _bytes_field(field, payload):
+    return _key(field, 2) + _varint(len(payload)) + payload
+
+
+def _packed(field, ints):
+    return _bytes_field(field, b"".join(_varint(i) for i in ints))
+
+
+def _command(cmd, count):
+    return (cmd & 0x7) | (count << 3)
+
+
+def _encode_value(v):
+    """MVT Value message for a str / bool / int / float property."""
+    if isinstance(v, np.generic):
+        v = v.item()
+    if isinstance(v, str):
+        return _bytes_field(1, v.encode("utf-8"))
+    if isinstance(v, bool):
+        return _key(7, 0) + _varint(int(v))
+    if isinstance(v, int):
+        return _key(5, 0) + _varint(v) if v >= 0 else _key(6, 0) + _varint(_zigzag(v))
+    return _key(3, 1) + np.float64(v).tobytes()
+
+
+def _ring_commands(coords, cursor):
+    """MoveTo / LineTo / ClosePath for one closed ring (last vertex repeats the first)."""
+    pts = coords[:-1]
+    cmds = [_command(CMD_MOVE_TO, 1)]
+    x, y = pts[0]
+    cmds += [_zigzag(x - cursor[0]), _zigzag(y - cursor[1])]
+    cmds.append(_command(CMD_LINE_TO, len(pts) - 1))
+    for px, py in pts[1:]:
+        cmds += [_zigzag(px - x), _zigzag(py - y)]
+        x, y = px, py
+    cmds.append(_command(CMD_CLOSE_PATH, 1))
+    return cmds, (x, y)
+
+
+def _polygon_commands(geom):
+    """Command stream for a (Multi)Polygon already in integer tile coordinates."""
+    cmds, cursor = [], (0, 0)
+    for poly in getattr(geom, "geoms", [geom]):
+        for ring in [poly.exterior, *poly.interiors]:
+            coords = np.asarray(ring.coords, dtype=np.int64).tolist()
+            if len(coords) < 4:
+                continue
+            ring_cmds, cursor = _ring_commands(coords, cursor)
+            cmds += ring_cmds
+    return cmds
+
+
+def _point_commands(x, y):
+    return [_command(CMD_MOVE_TO, 1), _zigzag(int(x)), _zigzag(int(y))]
+
+
+def encode_layer(name, features):
+    """features: [(geom_type, commands, properties)] → MVT Layer bytes."""
+    keys, values = {}, {}
+    body = b""
+    for i, (geom_type, cmds, props) in enumerate(features):
+        tags = []
+        for k, v in props.items():
+            if v is None or (isinstance(v, float) and math.isnan(v)):
+                continue
+            tags += [keys.setdefault(k, len(keys)), values.setdefault((type(v).__name__, v), len(values))]
+        feature = (_key(1, 0) + _varint(i + 1) + _packed(2, tags)
+                   + _key(3, 0) + _varint(geom_type) + _packed(4, cmds))
+        body += _bytes_field(2, feature)
+    layer = (_key(15, 0) + _varint(2) + _bytes_field(1, name.encode("utf-8")) + body
+             + b"".join(_bytes_field(3, k.encode("utf-8")) for k in keys)
+             + b"".join(_bytes_field(4, _encode_value(v)) for _, v in values)
+             + _key(5, 0) + _varint(EXTENT))
+    return _bytes_field(3, layer)
+
+
+# === TILE MATH ===
+def mercator_units(lons, lats, z):
+    """Lon/lat → global Web Mercator tile units (EXTENT per tile) at zoom z."""
+    n = (2 ** z) * EXTENT
+    lat_r = np.radians(np.asarray(lats, dtype=np.float64))
+    x = (np.asarray(lons, dtype=np.float64) + 180.0) / 360.0 * n
+    y = (1.0 - np.log(np.tan(lat_r) + 1.0 / np.cos(lat_r)) / np.pi) / 2.0 * n
+    return x, y
+
+
+def _to_mercator(z):
+    def fn(coords):
+        x, y = mercator_units(coords[:, 0], coords[:, 1], z)
+        return np.column_stack([x, y])
+    return fn
+
+
+def tile_path(tile_dir, layer, z, x, y):
+    return os.path.join(tile_dir, layer, str(z), str(x), f"{y}.mvt")
+
+
+def etag(data):
+    return '"' + hashlib.sha1(data).hexdigest() + '"'
+
+
+# === HAZARD LAYER ===
+def hazard_tiles(geoms, var_values, zooms=HAZARD_ZOOMS):
+    """Yield ((z, x, y), tile bytes) for every non-empty hazard tile."""
+    for z in zooms:
+        merc = shapely.simplify(shapely.transform(geoms, _to_mercator(z)), SIMPLIFY_TOLERANCE)
+        b = shapely.bounds(merc)
+        tx0 = np.floor((b[:, 0] - BUFFER) / EXTENT).astype(np.int64)
+        tx1 = np.floor((b[:, 2] + BUFFER) / EXTENT).astype(np.int64)
+        ty0 = np.floor((b[:, 1] - BUFFER) / EXTENT).astype(np.int64)
+        ty1 = np.floor((b[:, 3] + BUFFER) / EXTENT).astype(np.int64)
+
+        by_tile = {}
+        for i in range(len(merc)):
+            for tx in range(tx0[i], tx1[i] + 1):
+                for ty in range(ty0[i], ty1[i] + 1):
+                    by_tile.setdefault((tx, ty), []).append(i)
+
+        for (tx, ty), idx in by_tile.items():
+            ox, oy = tx * EXTENT, ty * EXTENT
+            local = shapely.transform(merc[idx], lambda c: c - (ox, oy))
+            local = shapely.clip_by_rect(local, -BUFFER, -BUFFER, EXTENT + BUFFER, EXTENT + BUFFER)
+            local = shapely.orient_polygons(shapely.set_precision(local, 1.0))
+            features = []
+            for geom, var in zip(local, var_values[idx]):
+                polys = shapely.get_parts(geom)
+                polys = polys[shapely.get_type_id(polys) == 3]
+                if not len(polys):
+                    continue
+                cmds = _polygon_commands(shapely.multipolygons(polys))
+                if cmds:
+                    features.append((GEOM_POLYGON, cmds, {"Var": int(var)}))
+            if features:
+                yield (z, tx, ty), encode_layer("hazard", features)
+
+
+# === FDI LAYER ===
+def load_latest_fdi(fdi_file=FDI_FILE, now=None):
+    """
+    Current FDI row per point, with lower-case coordinate columns.
+
+    Uses the "current" rows when the file has them, otherwise rows stamped
+    at or before `now` (forecast rows are never "latest"). Whole rows are
+    kept, so FDI, FDI_class and SPI always come from the same timestamp.
+    """
+    df = pd.read_csv(fdi_file).rename(columns={"Latitude": "latitude", "Longitude": "longitude"})
+    if "source" in df.columns and (df["source"] == "current").any():
+        df = df[df["source"] == "current"]
+    else:
+        ts = pd.to_datetime(df["timestamp"], utc=True, format="ISO8601")
+        df = df[ts <= (pd.Timestamp.now(tz="UTC") if now is None else pd.Timestamp(now, tz="UTC"))]
+    df = df.sort_values("timestamp", kind="stable")
+    return df.drop_duplicates("point_id", keep="last").reset_index(drop=True)
+
+
+def point_hashes(df):
+    """Hash of each point's position and tile properties, keyed by point_id."""
+    cols = ["latitude", "longitude"] + [c for c in FDI_PROPERTIES if c != "point_id"]
+    rows = df[cols].astype(str).agg("|".join, axis=1)
+    return {pid: hashlib.sha1(r.encode("utf-8")).hexdigest()[:16] for pid, r in zip(df["point_id"], rows)}
+
+
+def point_tile_keys(lons, lats, z):
+    """(tile x, tile y, local x, local y) of points at zoom z."""
+    x, y = mercator_units(lons, lats, z)
+    tx, ty = np.floor(x / EXTENT).astype(np.int64), np.floor(y / EXTENT).astype(np.int64)
+    return tx, ty, np.rint(x - tx * EXTENT).astype(np.int64), np.rint(y - ty * EXTENT).astype(np.int64)
+
+
+def fdi_tiles(df, zooms=FDI_ZOOMS, only=None):
+    """Yield ((z, x, y), bytes or None) for FDI tiles; `only` limits to a set of tile keys."""
+    props = df[FDI_PROPERTIES].copy()
+    props["FDI"] = props["FDI"].round(4)
+    records = props.to_dict("records")
+    for z in zooms:
+        tx, ty, lx, ly = point_tile_keys(df["longitude"], df["latitude"], z)
+        by_tile = {}
+        for i in range(len(df)):
+            by_tile.setdefault((z, int(tx[i]), int(ty[i])), []).append(i)
+        wanted = by_tile.keys() if only is None else [k for k in only if k[0] == z]
+        for key in wanted:
+            idx = by_tile.get(key)
+            if not idx:
+                yield key, None
+                continue
+            features = [(GEOM_POINT, _point_commands(lx[i], ly[i]), records[i]) for i in idx]
+            yield key, encode_layer("fdi", features)
+
+
+def tiles_of_points(lons, lats, zooms=FDI_ZOOMS):
+    keys = set()
+    for z in zooms:
+        tx, ty, _, _ = point_tile_keys(lons, lats, z)
+        keys |= {(z, int(a), int(b)) for a, b in zip(tx, ty)}
+    return keys
+
+
+# === PYRAMID ===
+def write_tiles(tile_dir, layer, tiles, manifest):
+    """Write / remove tiles, recording their ETags in the manifest; returns (written, removed)."""
+    written = removed = 0
+    for (z, x, y), data in tiles:
+        path = tile_path(tile_dir, layer, z, x, y)
+        key = f"{z}/{x}/{y}"
+        if data is None:
+            if os.path.exists(path):
+                os.remove(path)
+                removed += 1
+            manifest["tiles"].pop(key, None)
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        manifest["tiles"][key] = etag(data)
+        written += 1
+    return written, removed
+
+
+def manifest_path(tile_dir, layer):
+    return os.path.join(tile_dir, layer, "manifest.json")
+
+
+def load_manifest(tile_dir, layer):
+    path = manifest_path(tile_dir, layer)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(tile_dir, layer, manifest):
+    with open(manifest_path(tile_dir, layer), "w") as f:
+        json.dump(manifest, f)
+
+
+def build_hazard(tile_dir=TILE_DIR, geojson_file=GEOJSON_FILE):
+    shutil.rmtree(os.path.join(tile_dir, "hazard"), ignore_errors=True)
+    geoms, var_values = load_hazard_polygons(geojson_file)
+    manifest = {"zooms": list(HAZARD_ZOOMS), "tiles": {}}
+    written, _ = write_tiles(tile_dir, "hazard", hazard_tiles(geoms, var_values), manifest)
+    save_manifest(tile_dir, "hazard", manifest)
+    return written
+
+
+def build_fdi(tile_dir=TILE_DIR, fdi_file=FDI_FILE):
+    shutil.rmtree(os.path.join(tile_dir, "fdi"), ignore_errors=True)
+    df = load_latest_fdi(fdi_file)
+    manifest = {"zooms": list(FDI_ZOOMS), "tiles": {}, "points": {}}
+    written, _ = write_tiles(tile_dir, "fdi", fdi_tiles(df), manifest)
+    manifest["points"] = {pid: [h, lat, lon] for (pid, h), lat, lon
+                          in zip(point_hashes(df).items(), df["latitude"], df["longitude"])}
+    save_manifest(tile_dir, "fdi", manifest)
+    return written
+
+
+def update_fdi(tile_dir=TILE_DIR, fdi_file=FDI_FILE):
+    """Rebuild only FDI tiles touched by new, changed or removed points."""
+    manifest = load_manifest(tile_dir, "fdi")
+    if manifest is None:
+        return build_fdi(tile_dir, fdi_file), None
+
+    df = load_latest_fdi(fdi_file)
+    new_hashes = point_hashes(df)
+    old_points = manifest["points"]
+    changed = [pid for pid, h in new_hashes.items() if old_points.get(pid, [None])[0] != h]
+    removed = [pid for pid in old_points if pid not in new_hashes]
+
+    touched = set()
+    old_moved = [old_points[pid] for pid in changed + removed if pid in old_points]
+    if old_moved:
+        touched |= tiles_of_points([p[2] for p in old_moved], [p[1] for p in old_moved])
+    now = df[df["point_id"].isin(changed)]
+    touched |= tiles_of_points(now["longitude"], now["latitude"])
+
+    written, n_removed = write_tiles(tile_dir, "fdi", fdi_tiles(df, only=touched), manifest)
+    manifest["points"] = {pid: [h, lat, lon] for (pid, h), lat, lon
+                          in zip(new_hashes.items(), df["latitude"], df["longitude"])}
+    save_manifest(tile_dir, "fdi", manifest)
+    return written + n_removed, len(changed) + len(removed)
+
+
+# === SERVER ===
+class TileCache:
+    """In-memory LRU of tile bytes + ETag, revalidated against file mtime."""
+
+    def __init__(self, tile_dir=TILE_DIR, maxsize=TILE_CACHE_SIZE):
+        self.tile_dir = tile_dir
+        self.memo = LRUMemo(maxsize)
+
+    def get(self, layer, z, x, y):
+        """(bytes, etag) or None if the tile does not exist (or the layer is unknown)."""
+        if layer not in LAYERS:
+            return None
+        path = tile_path(self.tile_dir, layer, z, x, y)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        cached = self.memo.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1], cached[2]
+        with open(path, "rb") as f:
+            data = f.read()
+        self.memo.put(path, (mtime, data, etag(data)))
+        return data, etag(data)
+
+
+def make_handler(cache):
+    class TileHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = self.path.split("?")[0].strip("/").split("/")
+            if (len(parts) != 5 or parts[0] != "tiles" or parts[1] not in LAYERS
+                    or not parts[4].endswith(".mvt")):
+                self.send_error(404)
+                return
+            try:
+                z, x, y = int(parts[2]), int(parts[3]), int(parts[4][:-4])
+            except ValueError:
+                self.send_error(404)
+                return
+            if min(z, x, y) < 0:
+                self.send_error(404)
+                return
+            tile = cache.get(parts[1], z, x, y)
+            if tile is None:
+                self.send_response(204)
+                self.end_headers()
+                return
+            data, tag = tile
+            if self.headers.get("If-None-Match") == tag:
+                self.send_response(304)
+                self.send_header("ETag", tag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", MVT_MIME_TYPE)
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("ETag", tag)
+            self.send_header("Cache-Control", "public, max-age=300")
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return TileHandler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build, update and serve hazard / FDI vector tiles")
+    parser.add_argument("command", choices=["build", "update", "serve"])
+    parser.add_argument("--layers", nargs="+", default=list(LAYERS), choices=LAYERS)
+    parser.add_argument("--geojson", default=GEOJSON_FILE)
+    parser.add_argument("--fdi", default=FDI_FILE)
+    parser.add_argument("--tile-dir", default=TILE_DIR)
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if "hazard" in args.layers:
+            n = build_hazard(args.tile_dir, args.geojson)
+            print(f"✅ Wrote {n} hazard tiles (z{HAZARD_ZOOMS.start}-{HAZARD_ZOOMS.stop - 1})")
+        if "fdi" in args.layers:
+            n = build_fdi(args.tile_dir, args.fdi)
+            print(f"✅ Wrote {n} FDI tiles (z{FDI_ZOOMS.start}-{FDI_ZOOMS.stop - 1})")
+    elif args.command == "update":
+        n_tiles, n_points = update_fdi(args.tile_dir, args.fdi)
+        if n_points is None:
+            print(f"⚠️ No FDI manifest found, built {n_tiles} tiles from scratch")
+        else:
+            print(f"✅ {n_points} FDI points changed, rebuilt {n_tiles} tiles")
+    else:
+        server = ThreadingHTTPServer(("0.0.0.0", args.port), make_handler(TileCache(args.tile_dir)))
+        print(f"✅ Serving {args.tile_dir}/ at http://localhost:{args.port}/tiles/<layer>/<z>/<x>/<y>.mvt")
+        server.serve_forever()
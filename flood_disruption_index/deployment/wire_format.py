@@ -0,0 +1,257 @@
+"""
+Compact Binary Wire Format
+--------------------------
+Compact alternative to the CSV-shaped payloads sent to the Flutter app
+(simplified_routes_pruned.csv, ncr_FDI.csv).
+
+Column encodings:
+    - coordinates : quantized to 1e-6 degrees (polyline6), delta-encoded,
+                    zigzag varints; columns with missing values prepend a
+                    validity bitmap and encode only the present values
+    - measures    : fixed-width little-endian arrays (float32 / uint8 / uint16 /
+                    int32, int64 when values exceed the int32 range)
+    - strings     : dictionary-encoded (route names, classes, timestamps, ids);
+                    code 0 is null, code k is dictionary entry k - 1
+
+Layout:
+    b"PJW1" | u32 n_rows | u16 n_cols | per column:
+        u8 name_len | name | u8 kind | u32 payload_len | payload
+
+Compression (gzip / deflate) is optional and negotiated from the request's
+Accept / Accept-Encoding headers via `negotiate`.
+
+Run directly for a size and encode/decode-time comparison against the
+CSV payloads on mobile-sized messages.
+"""
+
+import gzip
+import io
+import struct
+import time
+import zlib
+import numpy as np
+import pandas as pd
+
+# === CONFIGURATION ===
+MAGIC = b"PJW1"
+MIME_TYPE = "application/x-pjdsc-wire"
+CSV_MIME_TYPE = "text/csv"
+COORD_SCALE = 1e6  # polyline6 precision
+COORD_COLUMNS = {"lat", "lon", "latitude", "longitude", "Latitude", "Longitude"}
+
+KIND_COORD, KIND_F4, KIND_U1, KIND_U2, KIND_I4, KIND_STR, KIND_I8, KIND_COORD_NULL = 1, 2, 3, 4, 5, 6, 7, 8
+FIXED_DTYPES = {KIND_F4: "<f4", KIND_U1: "<u1", KIND_U2: "<u2", KIND_I4: "<i4", KIND_I8: "<i8"}
+
+BENCH_FILES = [
+    "simplified_routes_pruned.csv",
+    "simplified_routes_with_var.csv",
+    "../processed_data/ncr_FDI.csv",
+]
+BENCH_MESSAGE_ROWS = 200  # rows per mobile-sized message
+BENCH_REPEATS = 50
+
+
+# === VARINTS ===
+def _zigzag_varints(values):
+    """Encode int64 values as zigzag LEB128 varints (vectorized)."""
+    v = np.asarray(values, dtype=np.int64)
+    z = ((v << 1) ^ (v >> 63)).astype(np.uint64)
+    bits = np.zeros(len(z), dtype=np.int64)
+    nz = z > 0
+    bits[nz] = np.floor(np.log2(z[nz].astype(np.float64))).astype(np.int64) + 1
+    nbytes = np.maximum(1, (bits + 6) // 7)
+    width = int(nbytes.max()) if len(z) else 1
+    shifts = (7 * np.arange(width, dtype=np.uint64))[None, :]
+    groups = ((z[:, None] >> shifts) & np.uint64(0x7F)).astype(np.uint8)
+    more = np.arange(width)[None, :] < (nbytes[:, None] - 1)
+    groups[more] |= 0x80
+    return groups[np.arange(width)[None, :] < nbytes[:, None]].tobytes()
+
+
+def _decode_zigzag_varints(buf):
+    """Inverse of `_zigzag_varints`."""
+    b = np.frombuffer(buf, dtype=np.uint8)
+    if not len(b):
+        return np.empty(0, dtype=np.int64)
+    ends = np.flatnonzero((b & 0x80) == 0)
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    pos = np.arange(len(b)) - np.repeat(starts, ends - starts + 1)
+    parts = (b & 0x7F).astype(np.uint64) << (7 * pos).astype(np.uint64)
+    z = np.add.reduceat(parts, starts)
+    return (z >> np.uint64(1)).astype(np.int64) ^ -(z & np.uint64(1)).astype(np.int64)
+
+
+# === COLUMN CODECS ===
+def _column_kind(name, series):
+    if name in COORD_COLUMNS:
+        return KIND_COORD_NULL if series.isna().any() else KIND_COORD
+    if series.dtype == object or pd.api.types.is_string_dtype(series):
+        return KIND_STR
+    if pd.api.types.is_float_dtype(series):
+        # Integral floats (e.g. Var written as 2.0) pack as small ints
+        vals = series.to_numpy()
+        if np.all(np.isfinite(vals)) and np.all(vals == np.round(vals)):
+            series = series.astype(np.int64)
+        else:
+            return KIND_F4
+    lo, hi = series.min(), series.max()
+    if lo >= 0 and hi < 2 ** 8:
+        return KIND_U1
+    if lo >= 0 and hi < 2 ** 16:
+        return KIND_U2
+    if lo >= -2 ** 31 and hi < 2 ** 31:
+        return KIND_I4
+    return KIND_I8
+
+
+def _code_dtype(n_codes):
+    return "<u1" if n_codes <= 2 ** 8 else "<u2" if n_codes <= 2 ** 16 else "<u4"
+
+
+def _encode_column(kind, series):
+    if kind == KIND_COORD:
+        q = np.round(series.to_numpy(dtype=np.float64) * COORD_SCALE).astype(np.int64)
+        return _zigzag_varints(np.diff(q, prepend=0))
+    if kind == KIND_COORD_NULL:
+        valid = series.notna().to_numpy()
+        bitmap = np.packbits(valid, bitorder="little").tobytes()
+        return struct.pack("<I", len(bitmap)) + bitmap + _encode_column(KIND_COORD, series[valid])
+    if kind == KIND_STR:
+        valid = series.notna().to_numpy()
+        codes = np.zeros(len(series), dtype=np.int64)  # 0 = null
+        valid_codes, uniques = pd.factorize(series[valid].astype(str), sort=False)
+        codes[valid] = valid_codes + 1
+        out = io.BytesIO()
+        out.write(struct.pack("<I", len(uniques)))
+        for s in uniques:
+            raw = s.encode("utf-8")
+            out.write(struct.pack("<H", len(raw)))
+            out.write(raw)
+        out.write(codes.astype(_code_dtype(len(uniques) + 1)).tobytes())
+        return out.getvalue()
+    return series.to_numpy().astype(FIXED_DTYPES[kind]).tobytes()
+
+
+def _decode_column(kind, payload, n_rows):
+    if kind == KIND_COORD:
+        return np.cumsum(_decode_zigzag_varints(payload)) / COORD_SCALE
+    if kind == KIND_COORD_NULL:
+        (n_bitmap,) = struct.unpack_from("<I", payload, 0)
+        bitmap = np.frombuffer(payload, dtype=np.uint8, count=n_bitmap, offset=4)
+        valid = np.unpackbits(bitmap, count=n_rows, bitorder="little").astype(bool)
+        out = np.full(n_rows, np.nan)
+        out[valid] = _decode_column(KIND_COORD, payload[4 + n_bitmap:], int(valid.sum()))
+        return out
+    if kind == KIND_STR:
+        (n_dict,) = struct.unpack_from("<I", payload, 0)
+        off = 4
+        uniques = [None]
+        for _ in range(n_dict):
+            (ln,) = struct.unpack_from("<H", payload, off)
+            uniques.append(payload[off + 2:off + 2 + ln].decode("utf-8"))
+            off += 2 + ln
+        codes = np.frombuffer(payload, dtype=_code_dtype(n_dict + 1), count=n_rows, offset=off)
+        return np.asarray(uniques, dtype=object)[codes]
+    return np.frombuffer(payload, dtype=FIXED_DTYPES[kind], count=n_rows)
+
+
+# === TABLE CODEC ===
+def encode_table(df):
+    """Encode a DataFrame into the binary wire format."""
+    out = io.BytesIO()
+    out.write(MAGIC)
+    out.write(struct.pack("<IH", len(df), len(df.columns)))
+    for name in df.columns:
+        kind = _column_kind(name, df[name])
+        payload = _encode_column(kind, df[name])
+        raw_name = str(name).encode("utf-8")
+        out.write(struct.pack("<B", len(raw_name)))
+        out.write(raw_name)
+        out.write(struct.pack("<BI", kind, len(payload)))
+        out.write(payload)
+    return out.getvalue()
+
+
+def decode_table(buf):
+    """Decode a wire-format buffer back into a DataFrame."""
+    if buf[:4] != MAGIC:
+        raise ValueError("❌ Not a PJW1 wire-format payload")
+    n_rows, n_cols = struct.unpack_from("<IH", buf, 4)
+    off = 10
+    columns = {}
+    for _ in range(n_cols):
+        (name_len,) = struct.unpack_from("<B", buf, off)
+        name = buf[off + 1:off + 1 + name_len].decode("utf-8")
+        off += 1 + name_len
+        kind, payload_len = struct.unpack_from("<BI", buf, off)
+        off += 5
+        columns[name] = _decode_column(kind, buf[off:off + payload_len], n_rows)
+        off += payload_len
+    return pd.DataFrame(columns)
+
+
+# === CONTENT NEGOTIATION ===
+def _accepts(header, token):
+    """True if `token` is listed in a comma-separated header with q > 0."""
+    for part in (header or "").split(","):
+        fields = [f.strip() for f in part.split(";")]
+        if fields[0].lower() != token:
+            continue
+        q = next((f[2:] for f in fields[1:] if f.startswith("q=")), "1")
+        try:
+            return float(q) > 0
+        except ValueError:
+            return True
+    return False
+
+
+def negotiate(accept, accept_encoding):
+    """Pick (mime type, content encoding) from request headers."""
+    mime = MIME_TYPE if _accepts(accept, MIME_TYPE) else CSV_MIME_TYPE
+    if _accepts(accept_encoding, "gzip"):
+        encoding = "gzip"
+    elif _accepts(accept_encoding, "deflate"):
+        encoding = "deflate"
+    else:
+        encoding = "identity"
+    return mime, encoding
+
+
+def encode_response(df, accept="", accept_encoding=""):
+    """Return (body, headers) for a DataFrame according to the request headers."""
+    mime, encoding = negotiate(accept, accept_encoding)
+    body = encode_table(df) if mime == MIME_TYPE else df.to_csv(index=False).encode("utf-8")
+    if encoding == "gzip":
+        body = gzip.compress(body, mtime=0)
+    elif encoding == "deflate":
+        body = zlib.compress(body)
+    headers = {"Content-Type": mime, "Content-Encoding": encoding, "Vary": "Accept, Accept-Encoding"}
+    return body, headers
+
+
+# === BENCHMARK ===
+def _timed(fn, repeats=BENCH_REPEATS):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeats * 1000
+
+
+if __name__ == "__main__":
+    print(f"{'payload':<34}{'rows':>6}{'csv B':>9}{'csv.gz B':>10}{'wire B':>9}{'wire.gz B':>11}"
+          f"{'csv enc/dec ms':>17}{'wire enc/dec ms':>18}")
+    for path in BENCH_FILES:
+        df = pd.read_csv(path).head(BENCH_MESSAGE_ROWS)
+
+        csv_body, csv_enc = _timed(lambda: df.to_csv(index=False).encode("utf-8"))
+        _, csv_dec = _timed(lambda: pd.read_csv(io.BytesIO(csv_body)))
+        wire_body, wire_enc = _timed(lambda: encode_table(df))
+        decoded, wire_dec = _timed(lambda: decode_table(wire_body))
+
+        lat_col = next(c for c in df.columns if c in COORD_COLUMNS)
+        max_err = np.nanmax(np.abs(decoded[lat_col].to_numpy() - df[lat_col].to_numpy()))
+        assert max_err <= 0.5 / COORD_SCALE + 1e-12, "coordinate round trip exceeded quantization"
+
+        print(f"{path:<34}{len(df):>6}{len(csv_body):>9}{len(gzip.compress(csv_body)):>10}"
+              f"{len(wire_body):>9}{len(gzip.compress(wire_body)):>11}"
+              f"{csv_enc:>8.2f}/{csv_dec:<8.2f}{wire_enc:>9.2f}/{wire_dec:<8.2f}")
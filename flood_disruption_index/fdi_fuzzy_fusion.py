@@ -1,68 +1,91 @@
+"""
+Fuzzy Fusion of SPI and Hazard (FDI)
+------------------------------------
+Combines hazard intensity (Var) and normalized SPI into the Flood
+Disruption Index using weighted AND/OR fuzzy fusion.
+
+Full mode (default):
+    Recomputes every row and rewrites the FDI CSV.
+
+Incremental mode (--incremental):
+    Compares the new SPI input with the previous FDI output keyed by
+    (point_id, timestamp, source), recomputes FDI only for new or changed
+    rows, and appends a change feed of rows whose FDI or FDI_class changed
+    (plus deletions). The feed is also applied to a local JSON document
+    store standing in for Firestore; full runs rebuild that store from
+    scratch, so the store always mirrors the FDI CSV.
+
+The hazard table is joined through keyed_join.KeyedTable: Point_ID is
+declared unique, a duplicated point keeps its whole highest-Var row, and the join
+fails fast if it would change the number of SPI rows.
+
+Usage:
+    python fdi_fuzzy_fusion.py [--incremental]
+"""
+
+import argparse
+import json
+import os
 import pandas as pd
 import numpy as np
+from keyed_join import KeyedTable
 
-# === 1. Load datasets ===
-df_spi = pd.read_csv("processed_data/ncr_synthetic_SPI.csv")       # contains columns: point_id, SPI, SPI_norm, SPI_class, precipitation_total, etc.
-df_hazard = pd.read_csv("processed_data/test_classified_points.csv") # contains: Point_ID, Var, Latitude, Longitude
+# === CONFIGURATION ===
+SPI_FILE = "processed_data/ncr_synthetic_SPI.csv"
+HAZARD_FILE = "processed_data/test_classified_points.csv"
+OUTPUT_FILE = "processed_data/ncr_synthetic_FDI.csv"
+CHANGE_FEED_FILE = "processed_data/fdi_changes.jsonl"
+DOC_STORE_FILE = "processed_data/fdi_store.json"
 
-# Merge on point_id only
-df = pd.merge(df_spi, df_hazard[["Point_ID","Var","Latitude","Longitude"]],
-              left_on="point_id", right_on="Point_ID", how="left")
-df.drop(columns=["Point_ID"], inplace=True)
+KEY_COLS = ["point_id", "timestamp", "source"]
+HAZARD_PREFER = ("Var", "max")  # duplicate Point_IDs keep their highest-Var row
+INPUT_COLS = ["precipitation_total", "SPI_norm", "Var"]
+FDI_TOLERANCE = 1e-9
 
-# === 2. Fuzzification functions ===
-def fuzz_hazard(var):
-    """
-    Compressed hazard fuzzification: Var=0 none, 1 low, 2 medium, 3 high
-    Compress Var 2 & 3 slightly toward Var 1 to avoid extreme jumps
-    """
-    memberships = {}
-    # Scale to [0,1] and compress higher values
-    compressed_var = (var / 3) ** 0.8  # compress high hazards
-    
-    memberships["low"] = max(0, min(1, 1 - compressed_var))  # decreases with hazard
-    memberships["medium"] = max(0, min(1, 1 - abs(compressed_var - 0.3)/0.3))  # peak near medium hazard
-    memberships["high"] = max(0, min(1, compressed_var))  # increases with hazard
-    
-    return memberships
-
-def fuzz_spi(spi_norm):
+gamma = 0.9
+weights = {"low":0.3, "medium":0.6, "high":1.0}
+
+cols_order = ["point_id","Latitude","Longitude","timestamp","precipitation_total","source",
+              "SPI","SPI_norm","SPI_class","Var","FDI","FDI_class"]
+
+
+# === 1. Compute FDI ===
+def compute_fdi(var, spi_norm, precipitation_total):
     """
-    SPI fuzzification: normalized SPI in [0,1]
-    SPI=0.5 (mean) gives medium=1, low decreases, high increases gradually
+    Vectorized FDI over arrays.
+
+    Hazard memberships use Var compressed toward low ((Var / 3) ** 0.8);
+    SPI memberships peak at medium for SPI_norm = 0.5.
     """
-    memberships = {}
-    memberships["low"] = max(0, min(1, (0.6 - spi_norm)/0.6))
-    memberships["medium"] = max(0, 1 - abs(spi_norm - 0.5)/0.5)
-    memberships["high"] = max(0, min(1, (spi_norm - 0.4)/0.6))
-    return memberships
+    var = np.asarray(var, dtype=np.float64)
+    spi_norm = np.asarray(spi_norm, dtype=np.float64)
+    precipitation_total = np.asarray(precipitation_total, dtype=np.float64)
 
-# === 3. Compute FDI ===
-gamma = 0.9
-weights = {"low":0.3, "medium":0.6, "high":1.0}
-fdi_values = []
+    compressed_var = (var / 3) ** 0.8
+    hazard_fuzzy = {
+        "low": np.clip(1 - compressed_var, 0, 1),
+        "medium": np.clip(1 - np.abs(compressed_var - 0.3)/0.3, 0, 1),
+        "high": np.clip(compressed_var, 0, 1),
+    }
+    spi_fuzzy = {
+        "low": np.clip((0.6 - spi_norm)/0.6, 0, 1),
+        "medium": np.maximum(0, 1 - np.abs(spi_norm - 0.5)/0.5),
+        "high": np.clip((spi_norm - 0.4)/0.6, 0, 1),
+    }
 
-for idx, row in df.iterrows():
-    hazard_fuzzy = fuzz_hazard(row["Var"])
-    spi_fuzzy = fuzz_spi(row["SPI_norm"])
-    
-    fdi = 0
+    fdi = np.zeros(len(var))
     for level in ["low","medium","high"]:
         h = hazard_fuzzy[level]
         s = spi_fuzzy[level]
-        w = weights[level]
         # AND + OR fuzzy fusion
-        fdi += w * (gamma * (h*s) + (1-gamma)*(h + s - h*s))
-    
+        fdi += weights[level] * (gamma * (h*s) + (1-gamma)*(h + s - h*s))
+
     # small base FDI if no precipitation (ensures low hazard not zero)
-    if row["precipitation_total"] == 0:
-        fdi += 0.05 * hazard_fuzzy["low"]
-    
-    fdi_values.append(fdi)
+    fdi += np.where(precipitation_total == 0, 0.05 * hazard_fuzzy["low"], 0.0)
+    return fdi
 
-df["FDI"] = fdi_values
 
-# === 4. Classify FDI ===
+# === 2. Classify FDI ===
 def classify_fdi(fdi):
     if fdi < 0.3:
         return "low"
@@ -71,12 +94,133 @@ def classify_fdi(fdi):
     else:
         return "high"
 
-df["FDI_class"] = df["FDI"].apply(classify_fdi)
+def classify_fdi_array(fdi):
+    """Vectorized classify_fdi."""
+    return np.select([fdi < 0.3, fdi < 0.6], ["low", "medium"], "high")
 
-# === 5. Save final CSV ===
-cols_order = ["point_id","Latitude","Longitude","timestamp","precipitation_total","source",
-              "SPI","SPI_norm","SPI_class","Var","FDI","FDI_class"]
 
-df[cols_order].to_csv("processed_data/ncr_synthetic_FDI.csv", index=False)
-print("✅ Saved 'ncr_synthetic_FDI.csv' with FDI and classifications")
-print(df[cols_order].head(10))
\ No newline at end of file
+def load_inputs(spi_file=SPI_FILE, hazard_file=HAZARD_FILE):
+    """SPI rows joined with the hazard table (one hazard row per point)."""
+    df_spi = pd.read_csv(spi_file)       # contains columns: point_id, SPI, SPI_norm, SPI_class, precipitation_total, etc.
+    df_hazard = pd.read_csv(hazard_file) # contains: Point_ID, Var, Latitude, Longitude
+
+    hazard = KeyedTable(df_hazard[["Point_ID","Var","Latitude","Longitude"]], "Point_ID",
+                        prefer=HAZARD_PREFER, name=hazard_file)
+    if hazard.n_duplicates:
+        print(f"⚠️ {hazard_file}: resolved {hazard.n_duplicates} duplicate Point_ID rows (kept the highest-Var row)")
+    return hazard.join(df_spi, "point_id", ["Var","Latitude","Longitude"], expected_rows=len(df_spi))
+
+
+def with_row_key(df):
+    """Add an ordinal so repeated (point_id, timestamp, source) rows pair up in order."""
+    df = df.copy()
+    df["_dup"] = df.groupby(KEY_COLS, sort=False).cumcount()
+    return df
+
+
+def doc_id(row):
+    return f"{row['point_id']}|{row['timestamp']}|{row['source']}|{row['_dup']}"
+
+
+def to_doc(row):
+    """Document body of one FDI row; NaN becomes null so the JSON stays valid."""
+    return {c: None if isinstance(row[c], float) and np.isnan(row[c]) else row[c] for c in cols_order}
+
+
+# === 3. Incremental update ===
+def incremental_update(df_new, df_prev):
+    """
+    Recompute FDI only for new or changed rows.
+
+    Returns (full FDI frame, change feed records, number of rows recomputed).
+    """
+    new = with_row_key(df_new)
+    prev = with_row_key(df_prev)[KEY_COLS + ["_dup"] + INPUT_COLS + ["FDI", "FDI_class"]]
+    prev = prev.rename(columns={c: f"{c}_prev" for c in INPUT_COLS + ["FDI", "FDI_class"]})
+    keys = KEY_COLS + ["_dup"]
+    # Left merge keeps the new input's row order, so an unchanged refresh rewrites an identical CSV
+    merged = new.merge(prev, on=keys, how="left", indicator=True)
+    gone = prev[keys].merge(new[keys], on=keys, how="left", indicator=True)
+    deleted = gone[gone["_merge"] == "left_only"]
+
+    changed = merged["_merge"] == "left_only"
+    for col in INPUT_COLS:
+        a, b = merged[col], merged[f"{col}_prev"]
+        changed |= ~((a == b) | (a.isna() & b.isna()))
+
+    merged["FDI"] = merged["FDI_prev"]
+    merged["FDI_class"] = merged["FDI_class_prev"]
+    recompute = merged[changed]
+    merged.loc[changed, "FDI"] = compute_fdi(
+        recompute["Var"], recompute["SPI_norm"], recompute["precipitation_total"]
+    )
+    merged.loc[changed, "FDI_class"] = classify_fdi_array(merged.loc[changed, "FDI"].to_numpy())
+
+    # Change feed: rows whose FDI or class actually moved, plus deletions
+    fdi_moved = ~(np.abs(merged["FDI"] - merged["FDI_prev"]) <= FDI_TOLERANCE)
+    moved = changed & (fdi_moved | (merged["FDI_class"] != merged["FDI_class_prev"]))
+    feed = [
+        {"op": "upsert", "id": doc_id(r),
+         "doc": to_doc(r)}
+        for r in merged[moved].to_dict("records")
+    ]
+    feed += [{"op": "delete", "id": doc_id(r)} for r in deleted.to_dict("records")]
+
+    return merged[cols_order], feed, int(changed.sum())
+
+
+def write_store(store, store_file=DOC_STORE_FILE):
+    with open(store_file, "w") as f:
+        json.dump(store, f, allow_nan=False)
+    return len(store)
+
+
+def rebuild_store(result, store_file=DOC_STORE_FILE):
+    """Replace the document store with every row of a full FDI result."""
+    keyed = with_row_key(result)
+    return write_store({doc_id(r): to_doc(r) for r in keyed.to_dict("records")}, store_file)
+
+
+def apply_change_feed(feed, store_file=DOC_STORE_FILE):
+    """Apply a change feed to the local JSON document store (Firestore stand-in)."""
+    store = {}
+    if os.path.exists(store_file):
+        with open(store_file, "r") as f:
+            store = json.load(f)
+    for change in feed:
+        if change["op"] == "delete":
+            store.pop(change["id"], None)
+        else:
+            store[change["id"]] = change["doc"]
+    return write_store(store, store_file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fuzzy fusion of SPI and hazard into FDI")
+    parser.add_argument("--incremental", action="store_true",
+                        help="recompute only rows changed since the previous output")
+    args = parser.parse_args()
+
+    df = load_inputs()
+
+    if args.incremental and os.path.exists(OUTPUT_FILE):
+        df_prev = pd.read_csv(OUTPUT_FILE, float_precision="round_trip")  # exact FDI for unchanged rows
+        result, feed, n_recomputed = incremental_update(df, df_prev)
+        print(f"✅ Recomputed FDI for {n_recomputed} of {len(result)} rows")
+
+        with open(CHANGE_FEED_FILE, "a") as f:
+            for change in feed:
+                f.write(json.dumps(change, allow_nan=False) + "\n")
+        n_docs = apply_change_feed(feed)
+        print(f"✅ Appended {len(feed)} changes to {CHANGE_FEED_FILE} ({n_docs} docs in {DOC_STORE_FILE})")
+    else:
+        df["FDI"] = compute_fdi(df["Var"], df["SPI_norm"], df["precipitation_total"])
+        df["FDI_class"] = df["FDI"].apply(classify_fdi)
+        result = df[cols_order]
+        n_docs = rebuild_store(result)
+        print(f"✅ Rebuilt {DOC_STORE_FILE} with {n_docs} docs")
+
+    # === 4. Save final CSV ===
+    result.to_csv(OUTPUT_FILE, index=False)
+    print(f"✅ Saved '{OUTPUT_FILE}' with FDI and classifications")
+    print(result.head(10))
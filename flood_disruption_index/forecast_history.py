@@ -0,0 +1,172 @@
+"""
+Forecast History (Ring Buffer) and Forecast Skill
+-------------------------------------------------
+Keeps the last N_ISSUES hourly forecast pulls per point in preallocated
+NumPy ring buffers instead of an ever-growing CSV:
+
+    forecast[point, issue_slot, lead]   precipitation (mm), NaN if missing
+    issue_hours[issue_slot]             issue time (hours since epoch)
+    observed[point, obs_slot]           "current" precipitation per hour
+    obs_hours[obs_slot]                 valid hour stored in that slot
+
+Valid time of forecast[p, s, lead] = issue_hours[s] + lead. A pull
+overwrites one issue slot and one observation slot, so updates are O(1)
+in the history length; re-pulling within the same hour overwrites that
+hour's slot.
+
+Skill per lead hour compares every stored forecast with the observation
+for its valid hour (when still in the buffer): MAE, RMSE, bias and count.
+`trusted_horizon` is the longest lead whose MAE stays within a tolerance
+for all shorter leads.
+
+Usage:
+    python forecast_history.py            # print skill of the stored history
+
+Output:
+    - processed_data/forecast_history.npz
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+# === CONFIGURATION ===
+HISTORY_FILE = "processed_data/forecast_history.npz"
+N_ISSUES = 168       # 7 days of hourly pulls
+N_LEADS = 48         # OWM One Call hourly forecast length
+MAE_TOLERANCE_MM = 2.0
+NO_TIME = np.iinfo(np.int64).min
+
+
+def to_hour(ts):
+    """Unix seconds (scalar or array) → whole hours since epoch."""
+    return np.asarray(ts, dtype=np.int64) // 3600
+
+
+class ForecastHistory:
+    """Fixed-size (issue x lead) forecast ring buffer with observed values per valid hour."""
+
+    def __init__(self, point_ids, n_issues=N_ISSUES, n_leads=N_LEADS):
+        self.point_ids = list(point_ids)
+        self._p = {p: i for i, p in enumerate(self.point_ids)}
+        self.n_issues = n_issues
+        self.n_leads = n_leads
+        self.n_obs = n_issues + n_leads
+        n = len(self.point_ids)
+        self.forecast = np.full((n, n_issues, n_leads), np.nan, dtype=np.float32)
+        self.issue_hours = np.full(n_issues, NO_TIME, dtype=np.int64)
+        self.observed = np.full((n, self.n_obs), np.nan, dtype=np.float32)
+        self.obs_hours = np.full(self.n_obs, NO_TIME, dtype=np.int64)
+
+    # === UPDATES ===
+    def index_of(self, point_ids):
+        try:
+            return np.array([self._p[p] for p in point_ids], dtype=np.int64)
+        except KeyError as e:
+            raise KeyError(f"Point {e.args[0]} is not in the forecast history") from None
+
+    def push_forecast(self, issue_hour, point_ids, valid_hours, precip):
+        """Store one pull: per-row point, valid hour and precipitation."""
+        issue_hour = int(issue_hour)
+        slot = issue_hour % self.n_issues
+        if self.issue_hours[slot] != issue_hour:
+            self.forecast[:, slot, :] = np.nan
+            self.issue_hours[slot] = issue_hour
+        lead = np.asarray(valid_hours, dtype=np.int64) - issue_hour
+        ok = (lead >= 0) & (lead < self.n_leads)
+        self.forecast[self.index_of(np.asarray(point_ids)[ok]), slot, lead[ok]] = np.asarray(precip)[ok]
+
+    def push_observed(self, valid_hour, point_ids, precip):
+        """Store observed ("current") precipitation for one valid hour."""
+        valid_hour = int(valid_hour)
+        slot = valid_hour % self.n_obs
+        if self.obs_hours[slot] != valid_hour:
+            self.observed[:, slot] = np.nan
+            self.obs_hours[slot] = valid_hour
+        self.observed[self.index_of(point_ids), slot] = precip
+
+    # === READS ===
+    def valid_hours(self):
+        """(issue_slot, lead) valid hour of every forecast cell (NO_TIME for empty slots)."""
+        vh = self.issue_hours[:, None] + np.arange(self.n_leads)[None, :]
+        return np.where(self.issue_hours[:, None] == NO_TIME, NO_TIME, vh)
+
+    def latest(self):
+        """Most recent pull as a long frame (point_id, issue_time, valid_time, lead_h, precipitation)."""
+        if (self.issue_hours == NO_TIME).all():
+            return pd.DataFrame(columns=["point_id", "issue_time", "valid_time", "lead_h", "precipitation_total"])
+        slot = int(np.argmax(self.issue_hours))
+        issue = int(self.issue_hours[slot])
+        p_idx, lead = np.nonzero(~np.isnan(self.forecast[:, slot, :]))
+        return pd.DataFrame({
+            "point_id": np.asarray(self.point_ids, dtype=object)[p_idx],
+            "issue_time": pd.to_datetime(issue * 3600, unit="s", utc=True),
+            "valid_time": pd.to_datetime((issue + lead) * 3600, unit="s", utc=True),
+            "lead_h": lead,
+            "precipitation_total": self.forecast[p_idx, slot, lead],
+        })
+
+    def skill(self):
+        """Forecast − observed error per lead hour over everything in the buffers."""
+        vh = self.valid_hours()
+        obs_slot = np.where(vh == NO_TIME, 0, vh) % self.n_obs
+        has_obs = (vh != NO_TIME) & (self.obs_hours[obs_slot] == vh)
+
+        obs = np.where(has_obs[None], self.observed[:, obs_slot], np.nan)
+        err = (self.forecast - obs).astype(np.float64)
+        valid = ~np.isnan(err)
+        n = valid.sum(axis=(0, 1))
+        err0 = np.where(valid, err, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mae = np.abs(err0).sum(axis=(0, 1)) / n
+            rmse = np.sqrt((err0 ** 2).sum(axis=(0, 1)) / n)
+            bias = err0.sum(axis=(0, 1)) / n
+        return pd.DataFrame({"lead_h": np.arange(self.n_leads), "n": n, "mae": mae, "rmse": rmse, "bias": bias})
+
+    def trusted_horizon(self, tolerance_mm=MAE_TOLERANCE_MM, skill=None):
+        """Longest lead (h) for which every lead up to it has MAE ≤ tolerance; -1 if none."""
+        skill = self.skill() if skill is None else skill
+        ok = (skill["n"] > 0) & (skill["mae"] <= tolerance_mm)
+        bad = np.flatnonzero(~ok.to_numpy())
+        return int(bad[0]) - 1 if len(bad) else self.n_leads - 1
+
+    # === PERSISTENCE ===
+    def save(self, path=HISTORY_FILE):
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, point_ids=np.asarray(self.point_ids, dtype=str), forecast=self.forecast,
+                 issue_hours=self.issue_hours, observed=self.observed, obs_hours=self.obs_hours)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=HISTORY_FILE):
+        with np.load(path) as data:
+            n_issues, n_leads = data["forecast"].shape[1:]
+            history = cls(data["point_ids"].tolist(), n_issues, n_leads)
+            history.forecast[:] = data["forecast"]
+            history.issue_hours[:] = data["issue_hours"]
+            history.observed[:] = data["observed"]
+            history.obs_hours[:] = data["obs_hours"]
+        return history
+
+    @classmethod
+    def load_or_create(cls, point_ids, path=HISTORY_FILE):
+        """Stored history if it covers the same points, else an empty one."""
+        if os.path.exists(path):
+            history = cls.load(path)
+            if history.point_ids == list(point_ids):
+                return history
+            print(f"⚠️ Point set changed, starting a new forecast history in {path}")
+        return cls(point_ids)
+
+
+if __name__ == "__main__":
+    if not os.path.exists(HISTORY_FILE):
+        raise SystemExit(f"❌ {HISTORY_FILE} not found; run current_forecast_api_call.py first")
+    history = ForecastHistory.load()
+    stored = int((history.issue_hours != NO_TIME).sum())
+    print(f"✅ {stored}/{history.n_issues} forecast pulls for {len(history.point_ids)} points")
+
+    skill = history.skill()
+    print(skill[skill["n"] > 0].round(3).to_string(index=False))
+    print(f"\n📈 FDI forecasts trusted up to +{history.trusted_horizon()} h "
+          f"(MAE ≤ {MAE_TOLERANCE_MM} mm for every shorter lead)")
@@ -0,0 +1,202 @@
+"""
+Gamma-Fit SPI over Multiple Accumulation Windows
+------------------------------------------------
+Replaces the single regional z-score of compute_spi.py with the standard
+SPI construction, fitted per historical station:
+
+    1. Rolling accumulations (1/3/6/24 h) over a (points x hours) array,
+       computed in one vectorized pass with cumulative sums
+    2. Mixed gamma fit per station: zero-rain probability q plus gamma
+       shape/scale on positive totals, by vectorized MLE (Thom's estimate
+       refined with Newton steps on log(a) - digamma(a) = A)
+    3. Each forecast point uses its nearest station's fit (KD-tree lookup)
+    4. SPI = Φ⁻¹(q + (1 - q) · Gamma.cdf(x))
+
+The historical records are daily totals, so station fits are made on 24 h
+totals and rescaled to shorter windows assuming independent hours:
+shape_w = shape_24 · w/24 (same scale) and q_w = q_24^(w/24).
+
+Input:
+    - raw_data/ncr_1to6_25_C.csv, raw_data/ncr_7to12_24_C.csv
+    - processed_data/ncr_synthetic_precip.csv
+
+Output:
+    - processed_data/ncr_gamma_fits.csv
+    - processed_data/ncr_synthetic_SPI_gamma.csv
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+from scipy.special import digamma, gammainc, ndtri, polygamma
+
+# === CONFIGURATION ===
+HIST_FILES = ["raw_data/ncr_1to6_25_C.csv", "raw_data/ncr_7to12_24_C.csv"]
+PRECIP_FILE = "processed_data/ncr_synthetic_precip.csv"
+FITS_FILE = "processed_data/ncr_gamma_fits.csv"
+OUTPUT_FILE = "processed_data/ncr_synthetic_SPI_gamma.csv"
+
+WINDOWS_H = [1, 3, 6, 24]
+FIT_WINDOW_H = 24       # accumulation window of the historical samples
+PRIMARY_WINDOW_H = 1    # window exported as SPI / SPI_norm / SPI_class
+MIN_POSITIVE = 3        # stations with fewer wet samples use the pooled fit
+NEWTON_STEPS = 6
+SPI_CLIP = 3.0
+
+
+# === ACCUMULATION ===
+def rolling_accumulations(precip, windows=WINDOWS_H):
+    """
+    Trailing w-hour totals for every window over a (points x hours) array.
+
+    Returns {w: (points x hours)}; the first w-1 hours of each row are NaN.
+    """
+    precip = np.asarray(precip, dtype=np.float64)
+    csum = np.concatenate([np.zeros((precip.shape[0], 1)), np.cumsum(precip, axis=1)], axis=1)
+    out = {}
+    for w in windows:
+        acc = np.full(precip.shape, np.nan)
+        if w <= precip.shape[1]:
+            acc[:, w - 1:] = csum[:, w:] - csum[:, :-w]
+        out[w] = acc
+    return out
+
+
+# === GAMMA FIT ===
+def fit_gamma(samples):
+    """
+    Vectorized mixed-gamma MLE for each row of a (stations x samples) array.
+
+    NaN marks missing samples. Returns (q, shape, scale) arrays; rows with
+    too few wet samples get NaN shape/scale.
+    """
+    x = np.asarray(samples, dtype=np.float64)
+    valid = np.isfinite(x)
+    wet = valid & (x > 0)
+    n_valid = valid.sum(axis=1)
+    n_wet = wet.sum(axis=1)
+
+    q = np.where(n_valid > 0, (n_valid - n_wet) / np.maximum(n_valid, 1), np.nan)
+    xw = np.where(wet, x, 1.0)
+    mean = np.where(wet, x, 0.0).sum(axis=1) / np.maximum(n_wet, 1)
+    mean_log = np.where(wet, np.log(xw), 0.0).sum(axis=1) / np.maximum(n_wet, 1)
+
+    ok = n_wet >= MIN_POSITIVE
+    A = np.where(ok, np.log(np.where(ok, mean, 1.0)) - mean_log, np.nan)
+    A = np.where(A > 1e-8, A, np.nan)  # identical wet values have no spread
+
+    # Thom (1958) starting point, then Newton on f(a) = log(a) - digamma(a) - A
+    shape = (1 + np.sqrt(1 + 4 * A / 3)) / (4 * A)
+    for _ in range(NEWTON_STEPS):
+        f = np.log(shape) - digamma(shape) - A
+        df = 1 / shape - polygamma(1, shape)
+        shape = np.maximum(shape - f / df, 1e-6)
+    scale = mean / shape
+    return q, shape, scale
+
+
+def rescale_fit(q, shape, scale, window_h, fit_window_h=FIT_WINDOW_H):
+    """Rescale a fit on fit_window_h totals to window_h totals (independent hours)."""
+    ratio = window_h / fit_window_h
+    return q ** ratio, shape * ratio, scale
+
+
+def spi_from_fit(x, q, shape, scale):
+    """Φ⁻¹ of the mixed-gamma CDF, clipped to ±SPI_CLIP."""
+    x = np.asarray(x, dtype=np.float64)
+    cdf_wet = gammainc(shape, np.where(x > 0, x, 0.0) / scale)
+    # Zero totals take the centre of the dry mass (Stagge et al., 2015), not its top
+    H = np.where(x > 0, q + (1 - q) * cdf_wet, q / 2)
+    H = np.clip(H, 1e-10, 1 - 1e-10)
+    return np.where(np.isfinite(x), np.clip(ndtri(H), -SPI_CLIP, SPI_CLIP), np.nan)
+
+
+def classify_spi(spi):
+    """Vectorized SPI bins (same thresholds as compute_spi.py)."""
+    return np.select(
+        [spi < -1.5, spi < -0.5, spi < 0.5, spi < 1.5],
+        ["dry", "slightly_dry", "normal", "wet"],
+        "very_wet",
+    )
+
+
+# === STATIONS ===
+def load_station_fits(hist_files=HIST_FILES):
+    """Fit every historical station at once; pooled fit fills sparse stations."""
+    hist = pd.concat([pd.read_csv(f) for f in hist_files], ignore_index=True)
+    hist["precipitation_total"] = pd.to_numeric(hist["precipitation_total"], errors="coerce")
+
+    stations = hist.groupby("point_id")[["latitude", "longitude"]].mean()
+    matrix = hist.pivot_table(index="point_id", columns="date",
+                              values="precipitation_total", aggfunc="mean")
+    matrix = matrix.reindex(stations.index)
+
+    q, shape, scale = fit_gamma(matrix.to_numpy())
+    pq, pshape, pscale = fit_gamma(matrix.to_numpy().reshape(1, -1))
+    sparse = ~np.isfinite(shape)
+    q = np.where(np.isfinite(q), q, pq[0])
+    shape = np.where(sparse, pshape[0], shape)
+    scale = np.where(sparse, pscale[0], scale)
+
+    stations["q"], stations["shape"], stations["scale"] = q, shape, scale
+    stations["pooled"] = sparse
+    return stations.reset_index()
+
+
+def nearest_station(stations, lats, lons):
+    """Index of the nearest station for each query point."""
+    ref = np.radians(stations["latitude"].mean())
+    xy = np.column_stack([stations["longitude"] * np.cos(ref), stations["latitude"]])
+    tree = cKDTree(xy)
+    _, idx = tree.query(np.column_stack([np.asarray(lons) * np.cos(ref), np.asarray(lats)]))
+    return idx
+
+
+def compute_gamma_spi(precip, station_idx, stations, windows=WINDOWS_H):
+    """SPI per window for a (points x hours) precipitation array."""
+    acc = rolling_accumulations(precip, windows)
+    q0 = stations["q"].to_numpy()[station_idx][:, None]
+    shape0 = stations["shape"].to_numpy()[station_idx][:, None]
+    scale0 = stations["scale"].to_numpy()[station_idx][:, None]
+    spi = {}
+    for w in windows:
+        q, shape, scale = rescale_fit(q0, shape0, scale0, w)
+        spi[w] = spi_from_fit(acc[w], q, shape, scale)
+    return acc, spi
+
+
+if __name__ == "__main__":
+    # === 1. Fit historical stations ===
+    stations = load_station_fits()
+    stations.to_csv(FITS_FILE, index=False)
+    print(f"✅ Fitted gamma parameters for {len(stations)} stations "
+          f"({int(stations['pooled'].sum())} using the pooled fit) → {FITS_FILE}")
+
+    # === 2. Arrange forecast precipitation as (points x hours) ===
+    df = pd.read_csv(PRECIP_FILE)
+    df = df.sort_values(["point_id", "timestamp"], kind="stable")
+    df["hour_idx"] = df.groupby("point_id").cumcount()
+    points = df.groupby("point_id", sort=True)[["latitude", "longitude"]].first()
+    precip = (
+        df.pivot(index="point_id", columns="hour_idx", values="precipitation_total")
+        .reindex(points.index).to_numpy()
+    )
+
+    # === 3. SPI per accumulation window ===
+    station_idx = nearest_station(stations, points["latitude"], points["longitude"])
+    acc, spi = compute_gamma_spi(precip, station_idx, stations)
+
+    row = points.index.get_indexer(df["point_id"])
+    col = df["hour_idx"].to_numpy()
+    for w in WINDOWS_H:
+        df[f"precip_{w}h"] = acc[w][row, col]
+        df[f"SPI_{w}h"] = spi[w][row, col]
+
+    df["SPI"] = df[f"SPI_{PRIMARY_WINDOW_H}h"]
+    df["SPI_norm"] = (df["SPI"].clip(-3, 3) + 3) / 6
+    df["SPI_class"] = classify_spi(df["SPI"].to_numpy())
+
+    # === 4. Save output ===
+    df.drop(columns=["hour_idx"]).to_csv(OUTPUT_FILE, index=False)
+    print(f"✅ Saved '{OUTPUT_FILE}' with SPI for {WINDOWS_H} h windows")
+    print(df.head())
@@ -0,0 +1,112 @@
+"""
+Keyed Join
+----------
+Many-to-one lookups against a table whose key is declared unique.
+
+A `KeyedTable` checks its key once when built:
+    - unique keys        : used as-is
+    - duplicate keys     : one whole row wins per key, chosen by `prefer`:
+                           "first" / "last" row, or (column, "max" | "min");
+                           values of different rows are never mixed. Without
+                           `prefer`, duplicates must be identical rows,
+                           otherwise `KeyConflictError` is raised
+
+The key is then turned into an integer position index, so joins are a
+single `get_indexer` plus positional `take` instead of a string-keyed
+merge. A join can never return more rows than its left side; every join
+states the row count it expects (`expected_rows`) and raises
+`CardinalityError` before anything is written downstream if it differs.
+
+Example (hazard table in fdi_fuzzy_fusion.py):
+    hazard = KeyedTable(df_hazard, "Point_ID", prefer=("Var", "max"))
+    df = hazard.join(df_spi, "point_id", ["Var", "Latitude", "Longitude"], expected_rows=len(df_spi))
+"""
+
+import numpy as np
+import pandas as pd
+
+# === CONFIGURATION ===
+ROW_POLICIES = {"first", "last"}
+COLUMN_POLICIES = {"max", "min"}
+
+
+class KeyConflictError(ValueError):
+    """Duplicate keys disagree and no `prefer` rule picks a row."""
+
+
+class CardinalityError(ValueError):
+    """A join changed the row count it was declared to preserve."""
+
+
+class KeyedTable:
+    """Right-hand table with a unique key and a pre-built integer index."""
+
+    def __init__(self, df, key, prefer=None, name=None):
+        self.key = key
+        self.name = name or key
+        if not (prefer is None or prefer in ROW_POLICIES
+                or (isinstance(prefer, tuple) and len(prefer) == 2 and prefer[1] in COLUMN_POLICIES)):
+            raise ValueError(f"Unknown duplicate-key rule: {prefer!r}")
+        self.prefer = prefer
+
+        self.n_duplicates = int(df[key].duplicated().sum())
+        self.df = self._resolve(df) if self.n_duplicates else df.reset_index(drop=True)
+        self.index = pd.Index(self.df[key])
+
+    def _resolve(self, df):
+        """Keep one whole row per key, in the rows' original order."""
+        if self.prefer is None:
+            value_cols = [c for c in df.columns if c != self.key]
+            disagree = df.groupby(self.key, sort=False)[value_cols].nunique(dropna=False).gt(1)
+            if disagree.any().any():
+                bad = disagree.any(axis=0)
+                keys = disagree.index[disagree.any(axis=1)]
+                raise KeyConflictError(
+                    f"{self.name}: duplicate {self.key} values disagree on "
+                    f"{list(bad[bad].index)} and no row is preferred "
+                    f"(e.g. {list(keys[:5])})"
+                )
+            return df.drop_duplicates(self.key).reset_index(drop=True)
+        if self.prefer in ROW_POLICIES:
+            return df.drop_duplicates(self.key, keep=self.prefer).reset_index(drop=True)
+
+        col, policy = self.prefer
+        winners = df.sort_values(col, ascending=policy == "min", kind="stable").drop_duplicates(self.key)
+        return winners.sort_index().reset_index(drop=True)
+
+    def positions(self, keys):
+        """Row position of each key in the resolved table (-1 if absent)."""
+        return self.index.get_indexer(keys)
+
+    def join(self, left, left_key, columns, expected_rows, how="left"):
+        """
+        Attach `columns` to every row of `left` by key; the result must
+        have exactly `expected_rows` rows.
+
+        how="left" keeps unmatched rows (NaN values); how="inner" drops them.
+        """
+        pos = self.positions(left[left_key])
+        matched = pos >= 0
+        if how == "inner":
+            left = left[matched]
+            pos = pos[matched]
+        elif how != "left":
+            raise ValueError(f"Unsupported join type: {how}")
+
+        out = left.reset_index(drop=True).copy()
+        for col in columns:
+            values = self.df[col].to_numpy()
+            if how == "inner" or matched.all():
+                out[col] = values[pos]
+            else:
+                out[col] = pd.Series(values).reindex(pos).to_numpy()
+
+        if len(out) != expected_rows:
+            raise CardinalityError(
+                f"Join with {self.name} returned {len(out)} rows, expected {expected_rows}"
+            )
+        return out
+
+    def summary(self):
+        return {"table": self.name, "rows": len(self.df), "duplicates_resolved": self.n_duplicates}
+
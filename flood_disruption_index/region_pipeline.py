@@ -0,0 +1,140 @@
+"""
+Multi-Region FDI Pipeline
+-------------------------
+Runs the FDI chain for many regions in parallel worker processes, one
+region per task:
+
+    1. Points : sample points clipped to the region boundary (Var from the
+                region's hazard layer if the points have none)
+    2. Stats  : regional μ / σ and per-point stats from the region's history
+    3. SPI    : SPI / SPI_norm / SPI_class with the region's own μ / σ
+    4. FDI    : fuzzy fusion of SPI and hazard (fdi_fuzzy_fusion.py)
+
+Each region writes only inside `processed_data/regions/<name>/`; a failing
+region is reported without stopping the others.
+
+Scope: isolated per region are the sample points, μ / σ and point stats,
+SPI and FDI. The hazard index is built in the worker from the region's own
+hazard layer and is not persisted. CRI entropy weights (climate_risk_index/
+shannon_weight.py) are not part of this runner and stay NCR-only.
+
+Usage:
+    python region_pipeline.py [--config regions.json] [--regions ncr ...] [--workers N]
+
+Output (per region):
+    - points.csv, point_stats.csv, regional_stats.txt, SPI.csv, FDI.csv,
+      manifest.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import traceback
+from multiprocessing import Pool
+import pandas as pd
+import shapely
+from compute_spi import compute_spi
+from fdi_fuzzy_fusion import classify_fdi_array, compute_fdi, cols_order, load_inputs
+from historical_precip_stat import load_history, precip_stats, save_regional_stats
+from regions import load_regions
+from spatial_sampler import load_boundary
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "deployment"))
+from hazard_index import HazardIndex  # noqa: E402
+
+# === CONFIGURATION ===
+WORKERS = os.cpu_count() or 1
+
+
+# === STAGES ===
+def region_points(region):
+    """Sample points inside the region boundary, with a Var column."""
+    points = pd.read_csv(region.points)
+    boundary = load_boundary(region.boundary)
+    inside = shapely.contains_xy(boundary, points["Longitude"].to_numpy(), points["Latitude"].to_numpy())
+    points = points[inside].reset_index(drop=True)
+    if "Var" not in points.columns:
+        hazard = HazardIndex.from_geojson(region.hazard)
+        points["Var"] = hazard.highest_var(points["Longitude"], points["Latitude"]).astype(int)
+    return points
+
+
+def run_region(region):
+    """All stages for one region; returns its manifest (or the error)."""
+    t0 = time.perf_counter()
+    try:
+        os.makedirs(region.output_dir, exist_ok=True)
+        timings = {}
+
+        t = time.perf_counter()
+        points = region_points(region)
+        points.to_csv(region.path("points.csv"), index=False)
+        timings["points"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        mu, sigma, point_stats = precip_stats(load_history(region.history))
+        point_stats.to_csv(region.path("point_stats.csv"), index=False)
+        save_regional_stats(region.path("regional_stats.txt"), mu, sigma)
+        timings["stats"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        precip = pd.read_csv(region.precip)
+        precip = precip[precip["point_id"].isin(points["Point_ID"])]
+        compute_spi(precip, mu, sigma).to_csv(region.path("SPI.csv"), index=False)
+        timings["spi"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        df = load_inputs(region.path("SPI.csv"), region.path("points.csv"))
+        df["FDI"] = compute_fdi(df["Var"], df["SPI_norm"], df["precipitation_total"])
+        df["FDI_class"] = classify_fdi_array(df["FDI"].to_numpy())
+        df[cols_order].to_csv(region.path("FDI.csv"), index=False)
+        timings["fdi"] = time.perf_counter() - t
+
+        manifest = {
+            "region": region.name, "ok": True, "pid": os.getpid(),
+            "points": len(points), "spi_rows": len(precip), "fdi_rows": len(df),
+            "mu": mu, "sigma": sigma,
+            "timings_s": {k: round(v, 3) for k, v in timings.items()},
+            "total_s": round(time.perf_counter() - t0, 3),
+        }
+        with open(region.path("manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+    except Exception as e:
+        return {"region": region.name, "ok": False, "error": f"{type(e).__name__}: {e}",
+                "traceback": traceback.format_exc(), "total_s": round(time.perf_counter() - t0, 3)}
+
+
+def run_regions(regions, workers=WORKERS):
+    """Run every region, in parallel when more than one worker is allowed."""
+    workers = max(1, min(workers, len(regions)))
+    if workers == 1:
+        return [run_region(r) for r in regions]
+    with Pool(workers) as pool:
+        return list(pool.imap_unordered(run_region, regions))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the FDI pipeline for many regions in parallel")
+    parser.add_argument("--config", default=None, help="JSON list of regions (default: NCR only)")
+    parser.add_argument("--regions", nargs="+", default=None, help="subset of region names")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args()
+
+    regions = load_regions(args.config, args.regions)
+    for region in regions:
+        missing = region.missing_inputs()
+        if missing:
+            print(f"⚠️ {region.name}: missing inputs {missing}")
+
+    t0 = time.perf_counter()
+    results = run_regions(regions, args.workers)
+    for r in sorted(results, key=lambda r: r["region"]):
+        if r["ok"]:
+            print(f"✅ {r['region']}: {r['points']} points, {r['fdi_rows']} FDI rows, "
+                  f"μ={r['mu']:.3f} σ={r['sigma']:.3f} in {r['total_s']:.2f}s (pid {r['pid']})")
+        else:
+            print(f"❌ {r['region']}: {r['error']}")
+    print(f"\n✅ {sum(r['ok'] for r in results)}/{len(results)} regions done in {time.perf_counter() - t0:.2f}s")
@@ -0,0 +1,87 @@
+"""
+Regions
+-------
+Everything the FDI pipeline needs to know about one region, so the same
+stages can run for NCR and any other city:
+
+    - boundary      : admin border GeoJSON (sample points outside are dropped)
+    - hazard        : NOAH hazard GeoJSON (used when the points have no Var)
+    - history       : historical daily precipitation CSVs (regional μ / σ)
+    - precip        : hourly precipitation to score (synthetic or forecast)
+    - points        : classified sample points (Point_ID, Latitude,
+                      Longitude[, Var])
+
+Each region writes only inside its own namespace
+`processed_data/regions/<name>/`, so the points, stats, SPI and FDI of one
+region never overwrite another's.
+
+Regions are read from a JSON list (see REGIONS_FILE); NCR with the
+existing file paths is the default when no config is given.
+"""
+
+import json
+import os
+
+# === CONFIGURATION ===
+REGIONS_FILE = "regions.json"
+OUTPUT_ROOT = "processed_data/regions"
+
+NCR = {
+    "name": "ncr",
+    "boundary": "../climate_risk_index/raw_data/ncr_land_admin_border.geojson",
+    "hazard": "raw_data/ncr_noah.geojson",
+    "history": ["raw_data/ncr_1to6_25_C.csv", "raw_data/ncr_7to12_24_C.csv"],
+    "precip": "processed_data/ncr_synthetic_precip.csv",
+    "points": "processed_data/test_classified_points.csv",
+}
+
+
+class Region:
+    """Input files and output namespace of one region."""
+
+    def __init__(self, name, boundary, hazard, history, precip, points, output_root=OUTPUT_ROOT):
+        self.name = name
+        self.boundary = boundary
+        self.hazard = hazard
+        self.history = list(history)
+        self.precip = precip
+        self.points = points
+        self.output_dir = os.path.join(output_root, name)
+
+    @classmethod
+    def from_dict(cls, d, output_root=OUTPUT_ROOT):
+        return cls(d["name"], d["boundary"], d["hazard"], d["history"], d["precip"], d["points"],
+                   output_root=d.get("output_root", output_root))
+
+    def path(self, filename):
+        """Path of an output file inside this region's namespace."""
+        return os.path.join(self.output_dir, filename)
+
+    def missing_inputs(self):
+        files = [self.boundary, self.precip, self.points] + self.history
+        return [f for f in files if not os.path.exists(f)]
+
+    def __repr__(self):
+        return f"Region({self.name!r})"
+
+
+def load_regions(config_file=None, names=None):
+    """Regions from a JSON list (or NCR only), optionally filtered by name."""
+    if config_file:
+        with open(config_file, "r") as f:
+            regions = [Region.from_dict(d) for d in json.load(f)]
+    else:
+        regions = [Region.from_dict(NCR)]
+
+    seen = set()
+    for region in regions:
+        if region.name in seen:
+            raise ValueError(f"Duplicate region name: {region.name}")
+        seen.add(region.name)
+
+    if names:
+        unknown = set(names) - seen
+        if unknown:
+            raise ValueError(f"Unknown regions: {sorted(unknown)}")
+        regions = [r for r in regions if r.name in names]
+    return regions
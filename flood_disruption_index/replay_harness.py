@@ -0,0 +1,256 @@
+"""
+Accelerated Event Replay (SPI → FDI)
+------------------------------------
+Replays hourly precipitation at N× real time through the streaming SPI and
+FDI stages to find the highest update rate the chain absorbs before its
+results go stale (e.g. a typhoon where every point changes every hour).
+
+    source ──queue──▶ SPI stage ──queue──▶ FDI stage ──▶ latest FDI per point
+
+- source    : one batch per event timestamp (all points), released at
+              t0 + (event_time − first_event) / speedup
+- SPI stage : compute_spi with the regional μ / σ
+- FDI stage : keyed hazard join (keyed_join.KeyedTable) + compute_fdi
+
+Measured per speedup:
+    - end-to-end lag (release → FDI done), p50 / p95 / max
+    - per-stage throughput (rows per busy second) and utilization
+    - backlog (batches waiting in each queue, sampled)
+
+A run is stale when p95 lag exceeds one event interval in wall time, i.e.
+the next hour's data arrives before the previous hour is scored.
+
+Input (any file with point_id, timestamp, precipitation_total):
+    - processed_data/ncr_synthetic_precip.csv (default)
+    - raw_data/ncr_current_forecast_precip.csv
+
+Usage:
+    python replay_harness.py [--input ...] [--speedups 3600 36000 360000]
+                             [--fanout 1] [--source synthetic]
+
+Output:
+    - replay_results/replay_<timestamp>.json
+"""
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from compute_spi import STATS_FILE, compute_spi, load_regional_stats
+from fdi_fuzzy_fusion import HAZARD_FILE, HAZARD_PREFER, classify_fdi_array, compute_fdi
+from keyed_join import KeyedTable
+
+# === CONFIGURATION ===
+INPUT_FILE = "processed_data/ncr_synthetic_precip.csv"
+RESULTS_DIR = "replay_results"
+SPEEDUPS = [3600, 36000, 360000]
+BACKLOG_SAMPLE_S = 0.005
+
+
+# === INPUT ===
+def load_events(input_file=INPUT_FILE, source=None, fanout=1):
+    """
+    Rows grouped into hourly (event_time, batch) in time order; fanout clones
+    the point network. Timestamps are floored to the hour, since a pull's
+    rows are stamped seconds apart.
+    """
+    df = pd.read_csv(input_file)
+    if source:
+        df = df[df["source"] == source]
+    if fanout > 1:
+        df = pd.concat(
+            [df.assign(point_id=df["point_id"] + (f"#{k}" if k else "")) for k in range(fanout)],
+            ignore_index=True,
+        )
+    df["event_time"] = pd.to_datetime(df["timestamp"], utc=True, format="ISO8601").dt.floor("h")
+    return [(t, batch.drop(columns="event_time").reset_index(drop=True))
+            for t, batch in df.groupby("event_time", sort=True)]
+
+
+def load_hazard(hazard_file=HAZARD_FILE, fanout=1):
+    hazard = pd.read_csv(hazard_file)[["Point_ID", "Var", "Latitude", "Longitude"]]
+    if fanout > 1:
+        hazard = pd.concat(
+            [hazard.assign(Point_ID=hazard["Point_ID"] + (f"#{k}" if k else "")) for k in range(fanout)],
+            ignore_index=True,
+        )
+    return KeyedTable(hazard, "Point_ID", prefer=HAZARD_PREFER, name=hazard_file)
+
+
+# === STAGES ===
+class Stage(threading.Thread):
+    """
+    Queue-to-queue worker that times its own busy periods. A failing batch
+    stops the stage with `error` set; the None sentinel is always forwarded
+    so downstream stages and the sink shut down instead of hanging.
+    """
+
+    def __init__(self, name, fn, inbox, outbox):
+        super().__init__(name=name, daemon=True)
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self.busy_s = 0.0
+        self.rows = 0
+        self.error = None
+
+    def run(self):
+        try:
+            while True:
+                item = self.inbox.get()
+                if item is None:
+                    return
+                released, batch = item
+                t = time.perf_counter()
+                out = self.fn(batch)
+                self.busy_s += time.perf_counter() - t
+                self.rows += len(batch)
+                self.outbox.put((released, out))
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+        finally:
+            self.outbox.put(None)
+
+
+def replay(events, hazard, mu, sigma, speedup):
+    """Run one replay at `speedup`; returns the measured summary (or the stage error)."""
+    q_spi, q_fdi, q_done = queue.Queue(), queue.Queue(), queue.Queue()
+
+    def fdi_step(spi):
+        df = hazard.join(spi, "point_id", ["Var", "Latitude", "Longitude"], expected_rows=len(spi))
+        df["FDI"] = compute_fdi(df["Var"], df["SPI_norm"], df["precipitation_total"])
+        df["FDI_class"] = classify_fdi_array(df["FDI"].to_numpy())
+        return df
+
+    stages = [
+        Stage("spi", lambda b: compute_spi(b, mu, sigma), q_spi, q_fdi),
+        Stage("fdi", fdi_step, q_fdi, q_done),
+    ]
+    for s in stages:
+        s.start()
+
+    backlog = {"spi": [], "fdi": []}
+    sampling = threading.Event()
+
+    def sample_backlog():
+        while not sampling.is_set():
+            backlog["spi"].append(q_spi.qsize())
+            backlog["fdi"].append(q_fdi.qsize())
+            time.sleep(BACKLOG_SAMPLE_S)
+
+    lags, latest = [], {}
+
+    def sink():
+        while True:
+            item = q_done.get()
+            if item is None:
+                return
+            released, df = item
+            lags.append(time.perf_counter() - released)
+            latest.update(zip(df["point_id"], df["FDI"]))
+
+    sampler = threading.Thread(target=sample_backlog, daemon=True)
+    collector = threading.Thread(target=sink, daemon=True)
+    sampler.start()
+    collector.start()
+
+    # Source: release each event batch on the accelerated clock
+    first = events[0][0]
+    start = time.perf_counter()
+    for event_time, batch in events:
+        release = start + (event_time - first).total_seconds() / speedup
+        delay = release - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        q_spi.put((release, batch))
+    q_spi.put(None)
+
+    collector.join()
+    wall_s = time.perf_counter() - start
+    sampling.set()
+    sampler.join()
+
+    errors = {s.name: s.error for s in stages if s.error}
+    if errors:
+        return {"speedup": speedup, "events": len(events), "wall_s": round(wall_s, 3),
+                "error": "; ".join(f"{name}: {err}" for name, err in errors.items()), "stale": True}
+
+    intervals = np.diff([t.timestamp() for t, _ in events])
+    interval_wall_s = float(np.median(intervals)) / speedup if len(intervals) else float("inf")
+    lags = np.array(lags)
+    p95 = float(np.percentile(lags, 95))
+    return {
+        "speedup": speedup,
+        "events": len(events),
+        "rows": int(sum(len(b) for _, b in events)),
+        "points": len(latest),
+        "event_interval_wall_ms": round(interval_wall_s * 1000, 3),
+        "wall_s": round(wall_s, 3),
+        "lag_p50_ms": round(float(np.percentile(lags, 50)) * 1000, 3),
+        "lag_p95_ms": round(p95 * 1000, 3),
+        "lag_max_ms": round(float(lags.max()) * 1000, 3),
+        "stages": {
+            s.name: {
+                "rows_per_s": round(s.rows / s.busy_s, 1) if s.busy_s else None,
+                "utilization": round(s.busy_s / wall_s, 3),
+                "backlog_max": int(max(backlog[s.name], default=0)),
+                "backlog_mean": round(float(np.mean(backlog[s.name])) if backlog[s.name] else 0.0, 3),
+            }
+            for s in stages
+        },
+        "stale": p95 > interval_wall_s,
+        "error": None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay hourly precipitation through SPI → FDI at N× real time")
+    parser.add_argument("--input", default=INPUT_FILE)
+    parser.add_argument("--hazard", default=HAZARD_FILE)
+    parser.add_argument("--stats", default=STATS_FILE)
+    parser.add_argument("--source", default=None, help="only replay rows with this source (e.g. current)")
+    parser.add_argument("--speedups", type=float, nargs="+", default=SPEEDUPS)
+    parser.add_argument("--fanout", type=int, default=1, help="clone the point network k times")
+    args = parser.parse_args()
+
+    # === 1. Load events, hazard table and regional stats ===
+    events = load_events(args.input, args.source, args.fanout)
+    if not events:
+        raise SystemExit(f"❌ No rows to replay in {args.input}")
+    hazard = load_hazard(args.hazard, args.fanout)
+    mu, sigma = load_regional_stats(args.stats)
+    print(f"✅ {len(events)} hourly batches, {sum(len(b) for _, b in events)} rows "
+          f"({events[0][0]} → {events[-1][0]})")
+
+    # === 2. Replay at each speedup ===
+    results = []
+    for speedup in sorted(args.speedups):
+        r = replay(events, hazard, mu, sigma, speedup)
+        results.append(r)
+        if r["error"]:
+            print(f"❌ failed at {speedup:g}×: {r['error']}")
+            continue
+        flag = "❌ stale" if r["stale"] else "✅ keeps up"
+        print(f"{flag} at {speedup:g}×: lag p50 {r['lag_p50_ms']} ms, p95 {r['lag_p95_ms']} ms "
+              f"(event interval {r['event_interval_wall_ms']} ms), "
+              f"SPI {r['stages']['spi']['rows_per_s']} rows/s (backlog ≤ {r['stages']['spi']['backlog_max']}), "
+              f"FDI {r['stages']['fdi']['rows_per_s']} rows/s (backlog ≤ {r['stages']['fdi']['backlog_max']})")
+
+    ok = [r["speedup"] for r in results if not r["error"] and not r["stale"]]
+    if ok:
+        print(f"\n📈 Highest sustained rate: {max(ok):g}× real time")
+    else:
+        print("\n⚠️ Results go stale at every tested speedup")
+
+    # === 3. Save results ===
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    started_at = datetime.now().strftime("%Y%m%dT%H%M%S")
+    out_path = os.path.join(RESULTS_DIR, f"replay_{started_at}.json")
+    with open(out_path, "w") as f:
+        json.dump({"started_at": started_at, "config": vars(args), "results": results}, f, indent=2)
+    print(f"\n✅ Saved results to {out_path}")
@@ -0,0 +1,169 @@
+"""
+Stratified Spatial Sampler
+--------------------------
+One sampler for both sampling networks, replacing the grid loop in
+climate_risk_index/ncr_coor_sampling.py and the list filtering in
+clean_sample_points.py.
+
+Steps:
+    1. Candidate grid  : dense lon/lat grid (e.g. 1000 x 1000) tested against
+                         the NCR boundary with vectorized `shapely.contains_xy`
+    2. Spacing         : grid-hashed Poisson-disk thinning enforces a minimum
+                         distance (meters) between kept points
+    3. Stratification  : per-Var quotas (Var 3 → 2 → 1 → centers) drawn with a
+                         seeded `numpy.random.Generator`, one Point_ID per pick
+
+Input:
+    - ../climate_risk_index/raw_data/ncr_land_admin_border.geojson
+    - processed_data/sample_points.json
+
+Output:
+    - processed_data/ncr_grid_points.csv
+    - processed_data/test_classified_points.csv
+"""
+
+import json
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry import shape
+
+# === CONFIGURATION ===
+BOUNDARY_FILE = "../climate_risk_index/raw_data/ncr_land_admin_border.geojson"
+SAMPLE_POINTS_JSON = "processed_data/sample_points.json"
+GRID_OUTPUT = "processed_data/ncr_grid_points.csv"
+CLASSIFIED_OUTPUT = "processed_data/test_classified_points.csv"
+
+GRID_ROWS = 1000
+GRID_COLS = 1000
+MIN_SPACING_M = 3000
+TARGET_POINTS = 30
+SEED = 42
+
+# Drawn in this order; earlier strata claim Point_IDs first
+VAR_QUOTAS = {3: 40, 2: 60, 1: 34, 0: 66}
+
+EARTH_RADIUS_M = 6371000
+
+
+# === HELPER FUNCTIONS ===
+def load_boundary(path=BOUNDARY_FILE):
+    """Union of every polygon in the boundary GeoJSON."""
+    with open(path, "r") as f:
+        data = json.load(f)
+    return shapely.union_all([shape(feat["geometry"]) for feat in data["features"]])
+
+
+def candidate_grid(poly, rows=GRID_ROWS, cols=GRID_COLS):
+    """Interior cell centers of a rows x cols grid over the polygon bounds."""
+    minx, miny, maxx, maxy = poly.bounds
+    xs = np.linspace(minx, maxx, cols + 2)[1:-1]
+    ys = np.linspace(miny, maxy, rows + 2)[1:-1]
+    lon, lat = np.meshgrid(xs, ys)
+    lon, lat = lon.ravel(), lat.ravel()
+    shapely.prepare(poly)
+    inside = shapely.contains_xy(poly, lon, lat)
+    return lon[inside], lat[inside]
+
+
+def poisson_disk_thin(lons, lats, min_spacing_m, rng):
+    """
+    Indices of a random subset with pairwise spacing >= min_spacing_m.
+
+    Uses a hash grid with cell size r / sqrt(2), so each cell holds at
+    most one kept point and only the 5 x 5 neighbouring cells need checks.
+    """
+    ref_lat = np.radians(np.mean(lats))
+    k = np.pi / 180 * EARTH_RADIUS_M
+    x = np.asarray(lons) * k * np.cos(ref_lat)
+    y = np.asarray(lats) * k
+
+    cell = min_spacing_m / np.sqrt(2)
+    cx = np.floor((x - x.min()) / cell).astype(np.int64)
+    cy = np.floor((y - y.min()) / cell).astype(np.int64)
+
+    # One random representative per cell, visited in random order
+    order = rng.permutation(len(x))
+    _, first = np.unique(cx[order] * (cy.max() + 1) + cy[order], return_index=True)
+    candidates = order[np.sort(first)]
+
+    occupied = {}
+    r2 = min_spacing_m ** 2
+    kept = []
+    for i in candidates:
+        ok = True
+        for dx in range(-2, 3):
+            for dy in range(-2, 3):
+                j = occupied.get((cx[i] + dx, cy[i] + dy))
+                if j is not None and (x[i] - x[j]) ** 2 + (y[i] - y[j]) ** 2 < r2:
+                    ok = False
+                    break
+            if not ok:
+                break
+        if ok:
+            occupied[(cx[i], cy[i])] = i
+            kept.append(i)
+    return np.asarray(kept, dtype=np.int64)
+
+
+def stratified_sample(pool, quotas, rng, id_col="Point_ID", var_col="Var"):
+    """
+    Draw quotas[var] rows per Var without reusing an id across strata.
+
+    `pool` is a DataFrame of (id, Var) candidates; repeated (id, Var) rows
+    are dropped first so an id is drawn at most once per stratum. Strata
+    are processed in the order of `quotas`.
+    """
+    pool = pool.drop_duplicates(subset=[id_col, var_col], keep="first").reset_index(drop=True)
+    ids = pool[id_col].to_numpy()
+    var_values = pool[var_col].to_numpy()
+    used = np.zeros(len(pool), dtype=bool)
+    chosen = []
+    for var, n in quotas.items():
+        available = np.flatnonzero((var_values == var) & ~used)
+        pick = rng.choice(available, size=min(n, len(available)), replace=False)
+        chosen.append(pick)
+        used |= np.isin(ids, ids[pick])
+        print(f"✅ Selected {len(pick)} Var {var} points (unique {id_col}s)")
+    return pool.iloc[np.concatenate(chosen)].reset_index(drop=True)
+
+
+def load_var_pool(path=SAMPLE_POINTS_JSON):
+    """Flatten sample_points.json into one (Point_ID, Latitude, Longitude, Var) table."""
+    with open(path, "r") as f:
+        data = json.load(f)
+    rows = []
+    for pid, info in data.items():
+        rows.append((pid, info["center"]["lat"], info["center"]["lon"], 0))
+        for cp in info["closest_points"]:
+            rows.append((pid, cp["closest_lat"], cp["closest_lon"], int(cp["Var"])))
+    return pd.DataFrame(rows, columns=["Point_ID", "Latitude", "Longitude", "Var"])
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(SEED)
+
+    # === 1. Grid sampling network ===
+    ncr_poly = load_boundary()
+    lons, lats = candidate_grid(ncr_poly)
+    print(f"✅ {len(lons)} of {GRID_ROWS * GRID_COLS} grid candidates inside NCR")
+
+    keep = poisson_disk_thin(lons, lats, MIN_SPACING_M, rng)
+    if len(keep) > TARGET_POINTS:
+        keep = np.sort(rng.choice(keep, size=TARGET_POINTS, replace=False))
+    grid_df = pd.DataFrame({
+        "Point_ID": [f"P{i+1:02d}" for i in range(len(keep))],
+        "Latitude": lats[keep].round(4),
+        "Longitude": lons[keep].round(4),
+    })
+    grid_df.to_csv(GRID_OUTPUT, index=False)
+    print(f"✅ Saved {len(grid_df)} points (≥ {MIN_SPACING_M} m apart) to {GRID_OUTPUT}")
+
+    # === 2. Stratified hazard sampling ===
+    pool = load_var_pool()
+    df = stratified_sample(pool, VAR_QUOTAS, rng)
+    df.to_csv(CLASSIFIED_OUTPUT, index=False)
+    print(f"\n✅ Saved '{CLASSIFIED_OUTPUT}' with {len(df)} unique points.")
+
+    print("\n--- Sample Summary (by Var) ---")
+    print(df["Var"].value_counts().sort_index())
@@ -1,3 +1,5 @@
+import 'dart:math' show log, max;
+
 import 'package:flutter/foundation.dart';
 
 class ClimateRiskProvider with ChangeNotifier {
@@ -5,7 +7,7 @@ class ClimateRiskProvider with ChangeNotifier {
   final Map<String, Map<String, double>> _minMax = {
     'temp_mean': {'min': 24.98, 'max': 31.5},
     'humidity_mean': {'min': 56.0, 'max': 96.0},
-    'precipitation_total': {'min': 0.0, 'max': 4.488},
+    'precipitation_total': {'min': 0.0, 'max': 4.488}, // log1p(mm), see _transform
     'wind_speed_max': {'min': 2.29, 'max': 16.09},
     'aqi_mean': {'min': 1.0, 'max': 4.72},
   };
@@ -19,11 +21,20 @@ class ClimateRiskProvider with ChangeNotifier {
     'aqi_mean': 0.2394,
   };
 
+  // === Same transform as shannon_weight.py / cri_scoring.py ===
+  // Precipitation is skewed, so its min-max (and the entropy weights) are in log1p(mm).
+  double _transform(String key, double value) {
+    if (key == 'precipitation_total') {
+      return log(1.0 + max(0.0, value));
+    }
+    return value;
+  }
+
   // === Function to normalize an indicator ===
   double _normalize(String key, double value) {
     final minVal = _minMax[key]!['min']!;
     final maxVal = _minMax[key]!['max']!;
-    final normalized = (value - minVal) / (maxVal - minVal);
+    final normalized = (_transform(key, value) - minVal) / (maxVal - minVal);
     return normalized.clamp(0.0, 1.0);
   }
 
@@ -0,0 +1,182 @@
+"""
+OWM Quota Broker
+----------------
+Cross-process rate limiter for the shared OpenWeatherMap API key.
+
+Every OWM-calling script takes a token before each request. State lives in
+a small JSON file guarded by an exclusive `fcntl` lock, so concurrent
+collectors (a live forecast refresh and a historical backfill, say) share
+one per-minute window and one daily budget instead of each sleeping on
+their own. The per-minute limit is a sliding 60 s window of grant
+timestamps, so no 60 s span ever holds more than PER_MINUTE grants.
+
+Collectors stop on QuotaExhausted (daily budget spent) and save what they
+have; the daily-summary backfills resume from their output CSV.
+
+Priority classes:
+    - PRIORITY_LIVE     : forecast refresh; registers as a waiter so that
+                          backfill jobs stand aside until it is served
+    - PRIORITY_BACKFILL : historical pulls; also keep a reserve of the
+                          minute window and daily budget free for live calls
+
+Configuration (environment variables):
+    OWM_QUOTA_STATE       state file (default ~/.cache/pjdsc/owm_quota.json)
+    OWM_QUOTA_PER_MINUTE  per-minute limit (default 60)
+    OWM_QUOTA_PER_DAY     daily limit, reset at 00:00 UTC (default 1000)
+
+Install (once, from the repository root) so every collector can import it:
+    pip install -e .
+
+Usage:
+    python owm_quota.py status
+"""
+
+import fcntl
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import UTC, datetime
+
+# === CONFIGURATION ===
+STATE_FILE = os.getenv(
+    "OWM_QUOTA_STATE", os.path.join(os.path.expanduser("~"), ".cache", "pjdsc", "owm_quota.json")
+)
+PER_MINUTE = int(os.getenv("OWM_QUOTA_PER_MINUTE", "60"))
+PER_DAY = int(os.getenv("OWM_QUOTA_PER_DAY", "1000"))
+
+PRIORITY_LIVE = "live"
+PRIORITY_BACKFILL = "backfill"
+
+WINDOW_S = 60
+# Backfill leaves min(reserve, limit // divisor) for live calls, so small
+# limits (e.g. OWM_QUOTA_PER_MINUTE=5) still grant backfill calls
+BACKFILL_MINUTE_RESERVE = 10   # minute grants, at most 1/6 of the limit
+BACKFILL_DAILY_RESERVE = 100   # daily calls, at most 1/10 of the limit
+MINUTE_RESERVE_DIVISOR = 6
+DAILY_RESERVE_DIVISOR = 10
+WAITER_TTL_S = 30              # live waiters not seen for this long are dropped
+POLL_S = 0.05
+
+
+class QuotaExhausted(Exception):
+    """Raised when the daily budget cannot serve the request."""
+
+
+class QuotaBroker:
+    """File-locked shared sliding-window limiter for one API key."""
+
+    def __init__(self, state_file=STATE_FILE, per_minute=PER_MINUTE, per_day=PER_DAY):
+        self.state_file = state_file
+        self.lock_file = state_file + ".lock"
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.minute_reserve = min(BACKFILL_MINUTE_RESERVE, per_minute // MINUTE_RESERVE_DIVISOR)
+        self.daily_reserve = min(BACKFILL_DAILY_RESERVE, per_day // DAILY_RESERVE_DIVISOR)
+        os.makedirs(os.path.dirname(os.path.abspath(state_file)), exist_ok=True)
+
+    # === STATE ===
+    @contextmanager
+    def _locked_state(self):
+        with open(self.lock_file, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                state = self._read()
+                self._refill(state)
+                yield state
+                self._write(state)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read(self):
+        try:
+            with open(self.state_file, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write(self, state):
+        tmp = self.state_file + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.state_file)
+
+    def _refill(self, state):
+        now = time.time()
+        today = datetime.now(UTC).strftime("%Y-%m-%d")
+        if state.get("day") != today:
+            state["day"] = today
+            state["used_today"] = 0
+        state["grants"] = [g for g in state.get("grants", []) if now - g[0] < WINDOW_S]
+        state.pop("tokens", None)
+        state.pop("updated", None)
+        waiters = state.get("live_waiters", {})
+        state["live_waiters"] = {k: t for k, t in waiters.items() if now - t < WAITER_TTL_S}
+
+    # === TOKENS ===
+    def _minute_left(self, state):
+        return self.per_minute - sum(k for _, k in state["grants"])
+
+    def _try_take(self, state, priority, n):
+        daily_left = self.per_day - state["used_today"]
+        minute_left = self._minute_left(state)
+        if priority == PRIORITY_BACKFILL:
+            if state["live_waiters"]:
+                return False
+            if minute_left - n < self.minute_reserve or daily_left - n < self.daily_reserve:
+                return False
+        elif minute_left < n or daily_left < n:
+            return False
+        state["grants"].append([time.time(), n])
+        state["used_today"] += n
+        return True
+
+    def acquire(self, priority=PRIORITY_BACKFILL, n=1, timeout=None):
+        """Block until n tokens are granted; raise QuotaExhausted when the day is spent."""
+        waiter_id = f"{os.getpid()}-{id(self)}"
+        deadline = None if timeout is None else time.time() + timeout
+        registered = False
+        try:
+            while True:
+                with self._locked_state() as state:
+                    if self._try_take(state, priority, n):
+                        state["live_waiters"].pop(waiter_id, None)
+                        registered = False
+                        return
+                    reserve = self.daily_reserve if priority == PRIORITY_BACKFILL else 0
+                    if self.per_day - state["used_today"] - n < reserve:
+                        raise QuotaExhausted(
+                            f"Daily OWM budget exhausted for {priority} calls "
+                            f"({state['used_today']}/{self.per_day} used)"
+                        )
+                    if priority == PRIORITY_LIVE:
+                        state["live_waiters"][waiter_id] = time.time()
+                        registered = True
+                if deadline is not None and time.time() > deadline:
+                    raise TimeoutError(f"No OWM quota granted within {timeout}s")
+                time.sleep(POLL_S)
+        finally:
+            if registered:
+                with self._locked_state() as state:
+                    state["live_waiters"].pop(waiter_id, None)
+
+    def status(self):
+        """Remaining daily budget and grants left in the current 60 s window."""
+        with self._locked_state() as state:
+            return {
+                "day": state["day"],
+                "used_today": state["used_today"],
+                "remaining_today": self.per_day - state["used_today"],
+                "minute_left": self._minute_left(state),
+                "live_waiters": len(state["live_waiters"]),
+            }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "status":
+        s = QuotaBroker().status()
+        print(f"📊 OWM quota {s['day']}: {s['remaining_today']}/{PER_DAY} calls left today, "
+              f"{s['minute_left']}/{PER_MINUTE} left this minute, {s['live_waiters']} live waiters")
+    else:
+        print(__doc__)